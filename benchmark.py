@@ -0,0 +1,292 @@
+"""
+Offline load test: feeds synthetic updates through the bot dispatcher
+against a fake Bot API session and a scratch SQLite database
+Usage: python benchmark.py [--users N] [--concurrency C] [--scale S] [--api-latency MS] [--json PATH]
+                           [--database-url URL]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from itertools import count
+from typing import get_origin
+
+ADMIN_ID = 1
+FIRST_USER_ID = 1000
+FLOWS = ('browse', 'add_to_cart', 'checkout', 'admin_confirm')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the bot dispatcher offline")
+    parser.add_argument('--users', type=int, default=200, help="Simulated users, each running every flow once")
+    parser.add_argument('--concurrency', type=int, default=1, help="Users running at the same time")
+    parser.add_argument('--scale', type=int, default=400, help="Generated products per category")
+    parser.add_argument('--api-latency', type=float, default=0.0, help="Simulated Bot API latency in ms")
+    parser.add_argument('--json', help="Write results to this file for regression comparison")
+    parser.add_argument('--database-url', help="Empty throwaway database to use instead of scratch SQLite, "
+                                               "e.g. postgresql://bench@localhost/bench_scratch")
+    return parser.parse_args()
+
+
+ARGS = parse_args()
+
+# The scratch database and admin roster must be configured before the bot modules are imported
+DB_DIR = tempfile.mkdtemp(prefix='store_bot_bench_')
+os.environ['DATABASE_URL'] = ARGS.database_url or f"sqlite:///{os.path.join(DB_DIR, 'bench.db')}"
+os.environ['ADMIN_IDS'] = str(ADMIN_ID)
+os.environ['CHANNEL_ID'] = ''
+os.environ['GEOCODER'] = 'offline'
+os.environ['ADMIN_SEND_RATE'] = '1000000'  # The fake Bot API has no flood control
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.default import DefaultBotProperties  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.enums import ParseMode  # noqa: E402
+from aiogram.types import Chat, Message  # noqa: E402
+
+from database import get_session, write_coordinator, UserRepository, CategoryRepository, ProductRepository, VariantRepository  # noqa: E402
+from database.models import Order  # noqa: E402
+from main import create_dispatcher  # noqa: E402
+from seed_data import seed_database  # noqa: E402
+from utils import CatalogCallback, CatalogAction, AdminCallback, OrderAction, geocoding  # noqa: E402
+from utils.events import event_bus  # noqa: E402
+
+
+# Per-update dispatcher logging would dominate the measurement
+logging.getLogger('aiogram.event').setLevel(logging.WARNING)
+
+
+class FakeSession(BaseSession):
+    """Bot API session that answers every method locally"""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+        self.error_replies = 0  # Handler errors reported to the user instead of raised
+        self._message_ids = count(1)
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls += 1
+        if str(getattr(method, 'text', '')).startswith("❌ Error"):
+            self.error_replies += 1
+        await asyncio.sleep(self.latency)
+        returning = method.__returning__
+        if returning is Message:
+            return self._message(method)
+        if get_origin(returning) is list:
+            return [self._message(method)]
+        return True
+
+    def _message(self, method):
+        chat_id = getattr(method, 'chat_id', None) or 0
+        return Message(
+            message_id=next(self._message_ids),
+            date=datetime.now(),
+            chat=Chat(id=int(chat_id) if str(chat_id).lstrip('-').isdigit() else 0, type='private'),
+        )
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b''
+
+    async def close(self):
+        pass
+
+
+class UpdateFactory:
+    """Builds raw Telegram updates for a simulated user"""
+
+    def __init__(self):
+        self._ids = count(1)
+
+    def _user(self, user_id):
+        return {'id': user_id, 'is_bot': False, 'first_name': f"User{user_id}"}
+
+    def _message(self, user_id, **content):
+        return {
+            'message_id': next(self._ids),
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': self._user(user_id),
+            **content
+        }
+
+    def text(self, user_id, text):
+        return {'update_id': next(self._ids), 'message': self._message(user_id, text=text)}
+
+    def location(self, user_id, latitude, longitude):
+        location = {'latitude': latitude, 'longitude': longitude}
+        return {'update_id': next(self._ids), 'message': self._message(user_id, location=location)}
+
+    def callback(self, user_id, data):
+        update_id = next(self._ids)
+        return {
+            'update_id': update_id,
+            'callback_query': {
+                'id': str(update_id),
+                'from': self._user(user_id),
+                'chat_instance': str(user_id),
+                'data': data,
+                'message': self._message(user_id, text="menu")
+            }
+        }
+
+
+def prepare_database(users: int, scale: int):
+    """Seed the catalog and register the simulated users"""
+    seed_database(scale=scale)
+    session = get_session()
+    try:
+        for user_id in [ADMIN_ID, *range(FIRST_USER_ID, FIRST_USER_ID + users)]:
+            UserRepository.create(session, telegram_id=user_id, phone_number=f"+1555{user_id:07d}")
+
+        catalog = []
+        for category in CategoryRepository.get_all_active(session):
+            first_page = ProductRepository.get_page_by_category(session, category.id, 10)
+            products = [
+                (product.id, [variant.id for variant in VariantRepository.get_by_product(session, product.id)])
+                for product in first_page.items
+            ]
+            catalog.append((category.id, products))
+        return catalog
+    finally:
+        session.close()
+
+
+def latest_pending_order(telegram_id: int):
+    session = get_session()
+    try:
+        user = UserRepository.get_by_telegram_id(session, telegram_id)
+        order = session.query(Order).filter(
+            Order.user_id == user.id,
+            Order.status == 'pending'
+        ).order_by(Order.id.desc()).first()
+        return order.id if order else None
+    finally:
+        session.close()
+
+
+async def run_user(dp, bot, factory, catalog, user_id, results):
+    """Run every flow once for one simulated user, timing each flow"""
+    category_id, products = catalog[user_id % len(catalog)]
+    product_id, variant_ids = products[user_id % len(products)]
+
+    async def timed(flow, updates):
+        start = time.perf_counter()
+        for update in updates:
+            try:
+                await dp.feed_raw_update(bot, update)
+            except Exception:
+                results['errors'][flow] += 1
+        results['latency'][flow].append(time.perf_counter() - start)
+        results['updates'][flow] += len(updates)
+
+    await timed('browse', [
+        factory.text(user_id, "🛍 Browse Categories"),
+        factory.callback(user_id, CatalogCallback(action=CatalogAction.CATEGORY, id=category_id).pack()),
+        factory.callback(user_id, CatalogCallback(
+            action=CatalogAction.CATEGORY, id=category_id, after=products[-1][0]
+        ).pack()),
+        factory.callback(user_id, CatalogCallback(action=CatalogAction.PRODUCT, id=product_id).pack()),
+    ])
+    await timed('add_to_cart', [
+        factory.callback(user_id, CatalogCallback(action=CatalogAction.ADD_VARIANT, id=variant_id).pack())
+        for variant_id in variant_ids[:2]
+    ])
+    await timed('checkout', [
+        factory.text(user_id, "🛒 View Cart"),
+        factory.callback(user_id, "checkout_confirm"),
+        factory.callback(user_id, "note_no"),
+        factory.location(user_id, 41.3 + user_id % 100 / 1000, 69.2 + user_id % 100 / 1000),
+    ])
+
+    order_id = latest_pending_order(user_id)
+    if order_id is None:
+        results['errors']['admin_confirm'] += 1
+        return
+    await timed('admin_confirm', [
+        factory.callback(ADMIN_ID, AdminCallback(action=OrderAction.CONFIRM, order_id=order_id).pack())
+    ])
+
+
+def percentile(samples, q):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method='inclusive')[q - 1]
+
+
+async def run_benchmark(args):
+    catalog = prepare_database(args.users, args.scale)
+
+    session = FakeSession(latency=args.api_latency / 1000)
+    bot = Bot(token='42:BENCHMARK', session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    dp = create_dispatcher(throttle=False)
+    factory = UpdateFactory()
+
+    results = {
+        'latency': {flow: [] for flow in FLOWS},
+        'updates': {flow: 0 for flow in FLOWS},
+        'errors': {flow: 0 for flow in FLOWS},
+    }
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited(user_id):
+        async with semaphore:
+            await run_user(dp, bot, factory, catalog, user_id, results)
+
+    await write_coordinator.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(user_id) for user_id in range(FIRST_USER_ID, FIRST_USER_ID + args.users)))
+    await event_bus.drain()
+    elapsed = time.perf_counter() - start
+    await geocoding.drain()
+    await write_coordinator.stop()
+
+    report = {
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'scale': args.scale,
+        'elapsed_seconds': elapsed,
+        'bot_api_calls': session.calls,
+        'error_replies': session.error_replies,
+        'flows': {}
+    }
+    for flow in FLOWS:
+        samples = results['latency'][flow]
+        busy = sum(samples) or 1e-9
+        report['flows'][flow] = {
+            'runs': len(samples),
+            'updates': results['updates'][flow],
+            'errors': results['errors'][flow],
+            'flows_per_second': len(samples) / busy * args.concurrency,
+            'updates_per_second': results['updates'][flow] / busy * args.concurrency,
+            'p50_ms': percentile(samples, 50) * 1000,
+            'p95_ms': percentile(samples, 95) * 1000,
+            'p99_ms': percentile(samples, 99) * 1000,
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\nUsers: {report['users']}  Concurrency: {report['concurrency']}  "
+          f"Products per category: {report['scale']}  Elapsed: {report['elapsed_seconds']:.2f}s  "
+          f"Bot API calls: {report['bot_api_calls']}  Error replies: {report['error_replies']}\n")
+    print(f"{'flow':<15}{'runs':>6}{'errors':>8}{'flows/s':>10}{'updates/s':>11}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for flow, stats in report['flows'].items():
+        print(f"{flow:<15}{stats['runs']:>6}{stats['errors']:>8}{stats['flows_per_second']:>10.1f}"
+              f"{stats['updates_per_second']:>11.1f}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}"
+              f"{stats['p99_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    report = asyncio.run(run_benchmark(ARGS))
+    print_report(report)
+    if ARGS.json:
+        with open(ARGS.json, 'w') as file:
+            json.dump(report, file, indent=2)
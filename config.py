@@ -5,19 +5,101 @@ File: config.py
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+# Also re-read at runtime for the admin roster and channel, see utils/live_config.py
+ENV_FILE = os.getenv('ENV_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'))
+load_dotenv(ENV_FILE)
 
 # Bot Configuration
 BOT_TOKEN = os.getenv('TOKEN')
 
 # Admin Configuration
 ADMIN_IDS = [int(id.strip()) for id in os.getenv('ADMIN_IDS', '').split(',') if id.strip()]
+ADMIN_SEND_CONCURRENCY = int(os.getenv('ADMIN_SEND_CONCURRENCY', '10'))  # Admin notifications sent or edited at once
+ADMIN_SEND_RATE = float(os.getenv('ADMIN_SEND_RATE', '20'))  # Admin notifications sent or edited per second
+CONFIG_RELOAD_INTERVAL = float(os.getenv('CONFIG_RELOAD_INTERVAL', '10'))  # Seconds between checks of .env and the admins table, 0 disables
+
+# Courier Configuration (Telegram IDs of couriers receiving delivery routes)
+COURIER_IDS = [int(id.strip()) for id in os.getenv('COURIER_IDS', '').split(',') if id.strip()]
 
 # Channel Configuration (for forwarding confirmed orders)
 CHANNEL_ID = os.getenv('CHANNEL_ID', '')  # e.g., '@yourchannel' or '-1001234567890'
 
 # Database Configuration
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///store_bot.db')
+WARMUP_CONNECTIONS = int(os.getenv('WARMUP_CONNECTIONS', '4'))  # Connections warmed before polling; 0 skips warming
+
+# Catalog Configuration
+CATALOG_PAGE_SIZE = int(os.getenv('CATALOG_PAGE_SIZE', '10'))  # Buttons per catalog keyboard page
+CATALOG_VERSION = int(os.getenv('CATALOG_VERSION', '1'))  # Bump to invalidate catalog buttons already sent
+
+# Throttling Configuration (per user)
+THROTTLE_RATE = float(os.getenv('THROTTLE_RATE', '2'))  # Sustained updates per second
+THROTTLE_BURST = int(os.getenv('THROTTLE_BURST', '5'))  # Updates allowed in a burst
+THROTTLE_DUPLICATE_WINDOW = float(os.getenv('THROTTLE_DUPLICATE_WINDOW', '1'))  # Seconds to drop repeated identical buttons
+
+# Logging Configuration
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # 'json' (one object per line) or 'text'
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.01'))  # Share of high-volume records kept, e.g. per-update timings
+
+# Metrics Configuration
+METRICS_LOG_INTERVAL = float(os.getenv('METRICS_LOG_INTERVAL', '300'))  # Seconds between log summaries, 0 disables
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))  # Port of the Prometheus /metrics endpoint, 0 disables
+
+# Dispatch Configuration
+DISPATCH_CELL_KM = float(os.getenv('DISPATCH_CELL_KM', '2'))  # Grid cell size for grouping nearby orders
+DISPATCH_MAX_STOPS = int(os.getenv('DISPATCH_MAX_STOPS', '10'))  # Orders per courier route
+STORE_LATITUDE = float(os.getenv('STORE_LATITUDE', '0')) or None  # Route start point; first stop when unset
+STORE_LONGITUDE = float(os.getenv('STORE_LONGITUDE', '0')) or None
+
+# Geocoding Configuration (fills in order addresses from shared locations)
+GEOCODER = os.getenv('GEOCODER', '')  # 'nominatim', 'offline' (stand-in for tests) or empty to disable
+GEOCODER_URL = os.getenv('GEOCODER_URL', 'https://nominatim.openstreetmap.org/reverse')
+GEOCODER_USER_AGENT = os.getenv('GEOCODER_USER_AGENT', 'store_bot')  # Nominatim requires an identifying agent
+GEOCODER_TIMEOUT = float(os.getenv('GEOCODER_TIMEOUT', '5'))  # Seconds per provider request
+GEOCODE_PRECISION = int(os.getenv('GEOCODE_PRECISION', '4'))  # Decimals kept in cache keys; 4 is about 11 m
+GEOCODE_CACHE_SIZE = int(os.getenv('GEOCODE_CACHE_SIZE', '4096'))  # Addresses kept in memory
+
+# Export Configuration
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))  # Rows fetched and written per chunk
+
+# Maintenance Configuration (archival, cart cleanup, vacuum)
+MAINTENANCE_INTERVAL = float(os.getenv('MAINTENANCE_INTERVAL', '86400'))  # Seconds between runs, 0 disables
+ORDER_RETENTION_DAYS = int(os.getenv('ORDER_RETENTION_DAYS', '365'))  # Older orders move to the archive, 0 keeps all
+CART_RETENTION_DAYS = int(os.getenv('CART_RETENTION_DAYS', '30'))  # Carts untouched this long are emptied, 0 keeps all
+ARCHIVE_DATABASE_URL = os.getenv('ARCHIVE_DATABASE_URL', '')  # Separate archive database; empty = archive tables in the main one
+MAINTENANCE_BATCH_SIZE = int(os.getenv('MAINTENANCE_BATCH_SIZE', '500'))  # Orders archived per write transaction
+VACUUM_PAGES = int(os.getenv('VACUUM_PAGES', '2000'))  # Free SQLite pages returned to the OS per run
+
+# Abandoned Cart Reminders
+CART_REMINDER_INTERVAL = float(os.getenv('CART_REMINDER_INTERVAL', '900'))  # Seconds between scans, 0 disables
+CART_REMINDER_AFTER_HOURS = float(os.getenv('CART_REMINDER_AFTER_HOURS', '24'))  # Cart idle time before a reminder
+CART_REMINDER_MAX_AGE_DAYS = float(os.getenv('CART_REMINDER_MAX_AGE_DAYS', '7'))  # Older carts are never reminded
+CART_REMINDER_BATCH_SIZE = int(os.getenv('CART_REMINDER_BATCH_SIZE', '200'))  # Cart items scanned per batch
+CART_REMINDER_RATE = float(os.getenv('CART_REMINDER_RATE', '20'))  # Reminder messages per second
+
+# Worker Configuration (python main.py --workers N)
+WORKERS = int(os.getenv('WORKERS', '1'))  # Worker processes; updates are sharded by user id when > 1
+WORKER_QUEUE_SIZE = int(os.getenv('WORKER_QUEUE_SIZE', '1000'))  # Updates buffered per worker before polling waits
+
+# Idempotency Configuration (re-delivered updates and callbacks are skipped)
+IDEMPOTENCY_TTL_HOURS = float(os.getenv('IDEMPOTENCY_TTL_HOURS', '48'))  # Telegram keeps undelivered updates for 24 hours
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '100000'))  # Keys kept in memory
+IDEMPOTENCY_FLUSH_INTERVAL = float(os.getenv('IDEMPOTENCY_FLUSH_INTERVAL', '1'))  # Seconds between ledger writes
+
+# Event Configuration (side effects of orders and carts run after the handler returns)
+EVENT_CONCURRENCY = int(os.getenv('EVENT_CONCURRENCY', '20'))  # Event subscribers running at once
+
+# Multi-tenant Configuration (python main.py --tenants tenants.json; updates come by webhook)
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+WEBHOOK_BASE_URL = os.getenv('WEBHOOK_BASE_URL', '')  # Public https URL of the server, e.g. 'https://bots.example.com'
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')  # Each tenant's bot posts to WEBHOOK_PATH/<tenant id>
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')  # Checked against Telegram's secret token header
+
+# Shutdown Configuration
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', '20'))  # Seconds to let running handlers finish; keep below the kill timeout
 
 # States for FSM (Finite State Machine)
 class States:
@@ -123,6 +205,24 @@ Please select another category.
     ITEM_ADDED = """
 ✅ Item added to cart!
 """
+    
+    ORDER_DELIVERED = """
+📦 Your order has been delivered!
+
+Order ID: #{order_id}
+
+Thank you for shopping with us!
+"""
+    
+    CART_REMINDER = """
+🛒 You still have items in your cart!
+
+Tap "🛒 View Cart" to finish your order.
+"""
+    
+    STALE_BUTTON = "⌛ This menu is outdated. Please open it again."
+    
+    THROTTLED = "⏳ Too many requests. Please slow down."
 
 # import os
 # from dotenv import load_dotenv
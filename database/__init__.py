@@ -1,17 +1,40 @@
-from database.models import Base, User, Category, Product, ProductVariant, CartItem, Order, OrderItem
-from database.db import init_db, get_session, close_session, engine
+from database.models import (
+    Base, User, Category, Product, ProductVariant, CartItem, Order, OrderItem,
+    OrderStatus, OrderStatusHistory, ORDER_TRANSITIONS, OrderAdminMessage, Delivery, GeocodeCache,
+    CartReminder, JobState, ProcessedUpdate, Admin, SchemaVersion, SCHEMA_VERSION
+)
+from database.views import (
+    CategoryView, ProductView, VariantView, CartLineView, UserView, CustomerView, OrderItemView, OrderView,
+    DispatchOrderView, RouteStopView
+)
+from database.tenancy import DEFAULT_TENANT, current_tenant, for_tenant
+from database.db import init_db, get_schema_version, get_session, close_session, engine, read_engine
 from database.queries import (
     UserRepository,
     CategoryRepository,
     ProductRepository,
     VariantRepository,
     CartRepository,
-    OrderRepository
+    OrderRepository,
+    DeliveryRepository,
+    GeocodeRepository,
+    ReminderRepository,
+    UpdateLedgerRepository,
+    AdminRepository
 )
+from database.reports import ReportRepository
+from database.writer import write_coordinator, run_write
 
 __all__ = [
     'Base', 'User', 'Category', 'Product', 'ProductVariant', 'CartItem', 'Order', 'OrderItem',
-    'init_db', 'get_session', 'close_session', 'engine',
+    'OrderStatus', 'OrderStatusHistory', 'ORDER_TRANSITIONS', 'OrderAdminMessage', 'Delivery', 'GeocodeCache',
+    'CartReminder', 'JobState', 'ProcessedUpdate', 'Admin', 'SchemaVersion', 'SCHEMA_VERSION',
+    'CategoryView', 'ProductView', 'VariantView', 'CartLineView', 'UserView', 'CustomerView', 'OrderItemView',
+    'OrderView', 'DispatchOrderView', 'RouteStopView',
+    'DEFAULT_TENANT', 'current_tenant', 'for_tenant',
+    'init_db', 'get_schema_version', 'get_session', 'close_session', 'engine', 'read_engine',
     'UserRepository', 'CategoryRepository', 'ProductRepository',
-    'VariantRepository', 'CartRepository', 'OrderRepository'
+    'VariantRepository', 'CartRepository', 'OrderRepository', 'DeliveryRepository',
+    'GeocodeRepository', 'ReminderRepository', 'UpdateLedgerRepository', 'AdminRepository', 'ReportRepository',
+    'write_coordinator', 'run_write'
 ]
\ No newline at end of file
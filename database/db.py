@@ -1,35 +1,227 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
-from database.models import Base
+import logging
+from sqlalchemy import create_engine, event, select, delete, insert, inspect
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker, scoped_session, Session as OrmSession
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.sql import Insert, Update, Delete
+from database.models import Base, SchemaVersion, SCHEMA_VERSION
+from config import DATABASE_URL
 import os
 
-# Database configuration
-DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///store_bot.db')
+logger = logging.getLogger(__name__)
 
-# Create engine
+IS_SQLITE = make_url(DATABASE_URL).get_backend_name() == 'sqlite'
+IS_POSTGRES = make_url(DATABASE_URL).get_backend_name() in ('postgresql', 'postgres')
+
+# Read/write split only makes sense for a file database shared by several connections
+SPLIT_READS = IS_SQLITE and make_url(DATABASE_URL).database not in (None, '', ':memory:')
+
+# Pragmas applied to every pooled SQLite connection
+SQLITE_PRAGMAS = {
+    'auto_vacuum': 'INCREMENTAL',  # Only takes effect on new files (or after VACUUM); see database.maintenance
+    'journal_mode': 'WAL',  # Readers never wait on the writer
+    'synchronous': 'NORMAL',  # No fsync per commit; WAL stays consistent on crash
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),  # ms to wait for a lock instead of failing
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-65536')),  # Negative = KiB, i.e. 64 MiB page cache
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', '268435456')),  # 256 MiB memory-mapped reads
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_READ_POOL_SIZE = int(os.getenv('SQLITE_READ_POOL_SIZE', '5'))
+
+# Connection pool for server databases (PostgreSQL), shared by all handlers of a worker
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # Seconds before a connection is replaced
+DB_PREPARE_THRESHOLD = int(os.getenv('DB_PREPARE_THRESHOLD', '5'))  # Executions before psycopg prepares server-side
+
+
+def _engine_url(url: str):
+    """
+    Pick the psycopg 3 driver for PostgreSQL URLs
+    The ORM here is synchronous, so async drivers such as asyncpg cannot be used
+    """
+    url = make_url(url)
+    if url.get_backend_name() not in ('postgresql', 'postgres') or url.get_driver_name() == 'psycopg':
+        return url
+    if url.get_driver_name() == 'asyncpg':
+        logger.warning("asyncpg needs an async engine; using the psycopg driver instead")
+    return url.set(drivername='postgresql+psycopg')
+
+
+def _engine_options() -> dict:
+    """Backend specific engine options"""
+    if IS_SQLITE:
+        options = {'connect_args': {'check_same_thread': False}}
+        if SPLIT_READS:
+            # A single serialized writer connection
+            options.update(pool_size=1, max_overflow=0)
+        return options
+    if IS_POSTGRES:
+        return {
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_recycle': DB_POOL_RECYCLE,
+            'query_cache_size': 1200,  # Compiled SQL cache shared by all sessions
+            'connect_args': {'prepare_threshold': DB_PREPARE_THRESHOLD},
+        }
+    return {}
+
+
+def _apply_pragmas(dbapi_connection, read_only: bool):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+    finally:
+        cursor.close()
+
+
+# Create engine (the only one allowed to write)
 engine = create_engine(
-    DATABASE_URL,
+    _engine_url(DATABASE_URL),
     echo=False,  # Set to True for SQL query logging during development
     pool_pre_ping=True,
-    connect_args={'check_same_thread': False} if 'sqlite' in DATABASE_URL else {}
+    **_engine_options()
 )
 
+# Schema changes and maintenance (vacuum, optimize) on a connection of their own, so they
+# never hold the coordinator's single writer connection; they wait on busy_timeout instead
+maintenance_engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    connect_args={'check_same_thread': False},
+    poolclass=NullPool
+) if SPLIT_READS else engine
+
+# Read-only engine for SQLite; other backends read through the main engine
+read_engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    connect_args={'check_same_thread': False},
+    pool_size=SQLITE_READ_POOL_SIZE,
+    max_overflow=-1  # Never block the event loop waiting for a reader
+) if SPLIT_READS else engine
+
+
+def _configure_writer(dbapi_connection, connection_record):
+    _apply_pragmas(dbapi_connection, read_only=False)
+    # Let SQLAlchemy emit BEGIN itself so it can take the write lock up front
+    dbapi_connection.isolation_level = None
+
+
+def _begin_immediate(conn):
+    # Avoids lock upgrade failures between processes; busy_timeout covers the wait
+    conn.exec_driver_sql('BEGIN IMMEDIATE')
+
+
+if IS_SQLITE:
+    for writer in {engine, maintenance_engine}:
+        event.listen(writer, 'connect', _configure_writer)
+        event.listen(writer, 'begin', _begin_immediate)
+
+if SPLIT_READS:
+    @event.listens_for(read_engine, 'connect')
+    def _configure_reader(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, read_only=True)
+
+
+class RoutingSession(OrmSession):
+    """
+    Session that reads through the reader pool and writes through the writer: DML statements
+    and flushes (see _route_flush) go to the writer. Once a transaction writes, the rest of it
+    stays on the writer so it sees its own changes
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.info.get('writing') or isinstance(clause, (Insert, Update, Delete)):
+            self.info['writing'] = True
+            return engine
+        return read_engine
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _route_flush(session, flush_context, instances):
+    session.info['writing'] = True
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _release_writer(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('writing', None)
+
+
 # Create session factory
-SessionFactory = sessionmaker(bind=engine)
+SessionFactory = sessionmaker(class_=RoutingSession)
 Session = scoped_session(SessionFactory)
 
 
-def init_db():
-    """Initialize database tables"""
-    Base.metadata.create_all(engine)
-    print("✅ Database initialized successfully!")
+def get_schema_version():
+    """Stored schema version, or None for a database that predates the schema_version table"""
+    try:
+        with read_engine.connect() as connection:
+            return connection.execute(select(SchemaVersion.version)).scalar()
+    except DBAPIError:
+        return None
+
+
+def upgrade_tables(connection, metadata=Base.metadata):
+    """
+    Bring tables created by an older version up to the models: create_all skips existing
+    tables, so add the columns they lack (nullable or with a server default, which fills
+    existing rows), drop indexes the models no longer define and create the missing ones
+    """
+    inspector = inspect(connection)
+    quote = connection.dialect.identifier_preparer.quote
+    for table in metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                spec = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE {quote(table.name)} ADD COLUMN {spec}')
+                logger.info(f"Added column {table.name}.{column.name}")
+        
+        defined = {index.name for index in table.indexes}
+        for index in inspector.get_indexes(table.name):
+            if index['name'] not in defined and not index.get('duplicates_constraint'):
+                on_table = f" ON {quote(table.name)}" if connection.dialect.name == 'mysql' else ""
+                connection.exec_driver_sql(f'DROP INDEX {quote(index["name"])}{on_table}')
+                logger.info(f"Dropped index {index['name']}")
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def init_db() -> bool:
+    """
+    Initialize database tables
+    A database already at SCHEMA_VERSION costs one query instead of create_all's check per table;
+    returns whether tables were (re)created
+    """
+    if get_schema_version() == SCHEMA_VERSION:
+        return False
+    
+    Base.metadata.create_all(maintenance_engine)
+    with maintenance_engine.begin() as connection:
+        upgrade_tables(connection)
+        connection.execute(delete(SchemaVersion.__table__))
+        connection.execute(insert(SchemaVersion.__table__).values(version=SCHEMA_VERSION))
+    logger.info("Database initialized")
+    return True
 
 
 def get_session():
-    """Get database session"""
-    return Session()
+    """
+    Get a new database session; the caller closes it
+    Handlers interleave on one thread, so a thread-local session would be shared between them
+    """
+    return SessionFactory()
 
 
 def close_session():
     """Close database session"""
-    Session.remove()
\ No newline at end of file
+    Session.remove()
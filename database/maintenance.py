@@ -0,0 +1,209 @@
+"""
+Database maintenance: archives old orders, empties abandoned carts and compacts the file
+Runs periodically inside the bot, or once with: python -m database.maintenance [--vacuum-full]
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import MetaData, Table, Column, Index, create_engine, select, insert, delete, exists, func
+from sqlalchemy.orm import Session
+from database.db import maintenance_engine, init_db, get_session, upgrade_tables, IS_SQLITE, IS_POSTGRES
+from database.models import Order, OrderItem, OrderStatusHistory, OrderAdminMessage, Delivery, CartItem
+from database.queries import _finish, UpdateLedgerRepository
+from database.tenancy import for_tenant
+from database.writer import run_write
+from config import (
+    ORDER_RETENTION_DAYS, CART_RETENTION_DAYS, ARCHIVE_DATABASE_URL, MAINTENANCE_BATCH_SIZE, VACUUM_PAGES,
+    IDEMPOTENCY_TTL_HOURS
+)
+
+logger = logging.getLogger(__name__)
+
+archive_metadata = MetaData()
+
+
+def _archive_table(table):
+    """Copy of a live table without foreign keys, so rows can outlive users and variants"""
+    return Table(
+        f"{table.name}_archive", archive_metadata,
+        *[Column(column.name, column.type, primary_key=column.primary_key, autoincrement=False)
+          for column in table.columns]
+    )
+
+
+orders_archive = _archive_table(Order.__table__)
+order_items_archive = _archive_table(OrderItem.__table__)
+order_status_history_archive = _archive_table(OrderStatusHistory.__table__)
+deliveries_archive = _archive_table(Delivery.__table__)
+
+Index('ix_orders_archive_user_created', orders_archive.c.user_id, orders_archive.c.created_at)
+Index('ix_order_items_archive_order', order_items_archive.c.order_id)
+
+# (live table, archive table, column with the order id); children before their order
+ARCHIVED_TABLES = (
+    (Delivery.__table__, deliveries_archive, 'order_id'),
+    (OrderStatusHistory.__table__, order_status_history_archive, 'order_id'),
+    (OrderItem.__table__, order_items_archive, 'order_id'),
+    (Order.__table__, orders_archive, 'id'),
+)
+
+# Archive tables live in the main database unless a separate one is configured
+archive_engine = create_engine(ARCHIVE_DATABASE_URL, pool_pre_ping=True) if ARCHIVE_DATABASE_URL else maintenance_engine
+
+
+class MaintenanceRepository:
+    """Archival and cleanup operations"""
+
+    @staticmethod
+    def get_archivable_order_ids(session: Session, before: datetime, limit: int):
+        """Oldest orders created before the cutoff, except those still out for delivery"""
+        out_for_delivery = exists().where(Delivery.order_id == Order.id, Delivery.delivered_at.is_(None))
+        return [
+            order_id for (order_id,) in
+            session.query(Order.id).filter(Order.created_at < before, ~out_for_delivery).order_by(Order.id).limit(limit)
+        ]
+
+    @staticmethod
+    def archive_orders(session: Session, order_ids, copy: bool = True, commit: bool = True):
+        """
+        Move orders with their items, status history and deliveries to the archive tables
+        copy=False only deletes, for rows already copied to a separate archive database
+        """
+        # Pointers to the admins' Telegram copies; an archived order is no longer synced
+        session.execute(delete(OrderAdminMessage.__table__).where(OrderAdminMessage.order_id.in_(order_ids)))
+        for live, archive, key in ARCHIVED_TABLES:
+            if copy:
+                session.execute(insert(archive).from_select(
+                    [column.name for column in live.columns],
+                    select(live).where(live.c[key].in_(order_ids))
+                ))
+            session.execute(delete(live).where(live.c[key].in_(order_ids)))
+        _finish(session, commit)
+        return len(order_ids)
+
+    @staticmethod
+    def purge_idle_carts(session: Session, before: datetime, commit: bool = True):
+        """Empty carts that got no new item since the cutoff; returns the number of removed items"""
+        idle_users = select(CartItem.user_id).group_by(CartItem.user_id).having(func.max(CartItem.created_at) < before)
+        result = session.execute(delete(CartItem.__table__).where(CartItem.user_id.in_(idle_users)))
+        _finish(session, commit)
+        return result.rowcount
+
+
+def _archivable_order_ids(before: datetime):
+    session = get_session()
+    try:
+        return MaintenanceRepository.get_archivable_order_ids(session, before, MAINTENANCE_BATCH_SIZE)
+    finally:
+        session.close()
+
+
+def _copy_to_archive_database(order_ids):
+    """Copy a batch to the separate archive database; re-running a batch replaces its rows"""
+    session = get_session()
+    try:
+        batches = [
+            (archive, key, session.execute(select(live).where(live.c[key].in_(order_ids))).mappings().all())
+            for live, archive, key in ARCHIVED_TABLES
+        ]
+    finally:
+        session.close()
+
+    with archive_engine.begin() as connection:
+        for archive, key, rows in batches:
+            connection.execute(delete(archive).where(archive.c[key].in_(order_ids)))
+            if rows:
+                connection.execute(insert(archive), [dict(row) for row in rows])
+
+
+def compact(pages: int = VACUUM_PAGES) -> int:
+    """Return free pages to the OS and refresh planner statistics; returns freed SQLite pages"""
+    if IS_POSTGRES:
+        # VACUUM cannot run inside a transaction
+        with maintenance_engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql("VACUUM (ANALYZE) orders, order_items, cart_items")
+        return 0
+    if not IS_SQLITE:
+        return 0
+
+    with maintenance_engine.connect() as connection:
+        freed = 0
+        if connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:  # INCREMENTAL
+            free_pages = connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+            connection.exec_driver_sql(f"PRAGMA incremental_vacuum({pages})")
+            freed = free_pages - connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+        else:
+            logger.info("Incremental vacuum is off for this database; run "
+                        "'python -m database.maintenance --vacuum-full' once to enable it")
+        # Runs ANALYZE only on tables whose statistics are stale
+        connection.exec_driver_sql("PRAGMA optimize")
+        connection.commit()
+    return freed
+
+
+def vacuum_full():
+    """Rebuild the SQLite file once, switching it to incremental auto-vacuum (blocks all writers)"""
+    if not IS_SQLITE:
+        return
+    connection = maintenance_engine.raw_connection()
+    try:
+        connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        connection.execute("VACUUM")
+    finally:
+        connection.close()
+
+
+async def run_maintenance(now: datetime = None) -> dict:
+    """
+    One maintenance pass: archive, purge carts and expired update keys, compact
+    Covers only the current tenant's orders unless run unscoped, i.e. for_tenant(None, ...)
+    """
+    now = now or datetime.utcnow()
+    stats = {'archived_orders': 0, 'purged_cart_items': 0, 'purged_update_keys': 0, 'freed_pages': 0}
+    archive_metadata.create_all(archive_engine)
+    # Archive tables take every live column, including ones added since they were created
+    with archive_engine.begin() as connection:
+        upgrade_tables(connection, archive_metadata)
+
+    if ORDER_RETENTION_DAYS > 0:
+        before = now - timedelta(days=ORDER_RETENTION_DAYS)
+        # Small batches keep each write transaction, and the lock it holds, short
+        while True:
+            order_ids = await asyncio.to_thread(_archivable_order_ids, before)
+            if not order_ids:
+                break
+            if archive_engine is maintenance_engine:
+                stats['archived_orders'] += await run_write(MaintenanceRepository.archive_orders, order_ids)
+            else:
+                await asyncio.to_thread(_copy_to_archive_database, order_ids)
+                stats['archived_orders'] += await run_write(MaintenanceRepository.archive_orders, order_ids, copy=False)
+            if len(order_ids) < MAINTENANCE_BATCH_SIZE:
+                break
+
+    if CART_RETENTION_DAYS > 0:
+        stats['purged_cart_items'] = await run_write(
+            MaintenanceRepository.purge_idle_carts, now - timedelta(days=CART_RETENTION_DAYS)
+        )
+
+    stats['purged_update_keys'] = await run_write(
+        UpdateLedgerRepository.purge, now - timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+    )
+
+    stats['freed_pages'] = await asyncio.to_thread(compact)
+    logger.info("Maintenance: %s", ", ".join(f"{name}={value}" for name, value in stats.items()))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old orders, purge idle carts and compact the database")
+    parser.add_argument('--vacuum-full', action='store_true',
+                        help="Rebuild the SQLite file first (enables incremental vacuum; stop the bot before)")
+    args = parser.parse_args()
+    from utils.log import setup_logging
+    setup_logging()
+
+    init_db()
+    if args.vacuum_full:
+        vacuum_full()
+    print(asyncio.run(for_tenant(None, run_maintenance)()))
@@ -1,17 +1,18 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Float, ForeignKey, DateTime, Boolean, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from database.tenancy import TenantMixin, DEFAULT_TENANT, current_tenant
 
 Base = declarative_base()
 
 
-class User(Base):
+class User(TenantMixin, Base):
     """User model for storing customer information"""
     __tablename__ = 'users'
     
     id = Column(Integer, primary_key=True)
-    telegram_id = Column(Integer, unique=True, nullable=False, index=True)
+    telegram_id = Column(BigInteger, nullable=False)  # Telegram ids exceed 32 bits
     phone_number = Column(String(20), nullable=False)
     username = Column(String(100))
     first_name = Column(String(100))
@@ -21,12 +22,17 @@ class User(Base):
     # Relationships
     orders = relationship('Order', back_populates='user', cascade='all, delete-orphan')
     cart_items = relationship('CartItem', back_populates='user', cascade='all, delete-orphan')
+    
+    # One customer per store
+    __table_args__ = (
+        Index('ix_users_tenant_telegram', 'tenant_id', 'telegram_id', unique=True),
+    )
 
     def __repr__(self):
         return f"<User {self.telegram_id} - {self.phone_number}>"
 
 
-class Category(Base):
+class Category(TenantMixin, Base):
     """Category model for product organization"""
     __tablename__ = 'categories'
     
@@ -39,12 +45,19 @@ class Category(Base):
     
     # Relationships
     products = relationship('Product', back_populates='category', cascade='all, delete-orphan')
+    
+    # Cover the keyset pagination order used by the categories keyboard; queries filter on
+    # tenant_id only in multi-tenant mode, so each mode has its own index
+    __table_args__ = (
+        Index('ix_categories_active_sort', 'is_active', 'order', 'name', 'id'),
+        Index('ix_categories_tenant_sort', 'tenant_id', 'is_active', 'order', 'name', 'id'),
+    )
 
     def __repr__(self):
         return f"<Category {self.name}>"
 
 
-class Product(Base):
+class Product(TenantMixin, Base):
     """Product model"""
     __tablename__ = 'products'
     
@@ -59,12 +72,17 @@ class Product(Base):
     # Relationships
     category = relationship('Category', back_populates='products')
     variants = relationship('ProductVariant', back_populates='product', cascade='all, delete-orphan')
+    
+    # Covers the keyset pagination order used by the products keyboard
+    __table_args__ = (
+        Index('ix_products_category_sort', 'category_id', 'is_active', 'order', 'name', 'id'),
+    )
 
     def __repr__(self):
         return f"<Product {self.name}>"
 
 
-class ProductVariant(Base):
+class ProductVariant(TenantMixin, Base):
     """Product variant model (e.g., different sizes, colors)"""
     __tablename__ = 'product_variants'
     
@@ -88,12 +106,12 @@ class ProductVariant(Base):
         return f"<Variant {self.name} - ${self.price}>"
 
 
-class CartItem(Base):
+class CartItem(TenantMixin, Base):
     """Shopping cart items"""
     __tablename__ = 'cart_items'
     
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
     variant_id = Column(Integer, ForeignKey('product_variants.id'), nullable=False)
     quantity = Column(Integer, default=1)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -101,12 +119,35 @@ class CartItem(Base):
     # Relationships
     user = relationship('User', back_populates='cart_items')
     variant = relationship('ProductVariant', back_populates='cart_items')
+    
+    # Keyset scans for stale carts (single-store and multi-tenant mode)
+    __table_args__ = (
+        Index('ix_cart_items_created', 'created_at', 'id'),
+        Index('ix_cart_items_tenant_created', 'tenant_id', 'created_at', 'id'),
+    )
 
     def __repr__(self):
         return f"<CartItem User:{self.user_id} Variant:{self.variant_id} Qty:{self.quantity}>"
 
 
-class Order(Base):
+class OrderStatus:
+    """Order lifecycle states"""
+    PENDING = 'pending'
+    CONFIRMED = 'confirmed'
+    CANCELLED = 'cancelled'
+    DELIVERED = 'delivered'
+
+
+# Allowed status transitions: current status -> statuses it may move to
+ORDER_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.CONFIRMED, OrderStatus.CANCELLED},
+    OrderStatus.CONFIRMED: {OrderStatus.DELIVERED, OrderStatus.CANCELLED},
+    OrderStatus.CANCELLED: set(),
+    OrderStatus.DELIVERED: set(),
+}
+
+
+class Order(TenantMixin, Base):
     """Order model"""
     __tablename__ = 'orders'
     
@@ -117,26 +158,94 @@ class Order(Base):
     location_latitude = Column(Float)
     location_longitude = Column(Float)
     location_address = Column(String(500))
-    status = Column(String(50), default='pending')  # pending, confirmed, cancelled, delivered
-    admin_message_id = Column(Integer)  # Message ID in admin chat
+    status = Column(String(50), default=OrderStatus.PENDING)  # See OrderStatus / ORDER_TRANSITIONS
+    admin_message_id = Column(Integer)  # Unused: admin copies are tracked in order_admin_messages
     channel_message_id = Column(Integer)  # Message ID in channel
+    rendered_body = Column(Text)  # Message body without the status, see utils.helpers.render_order_body
     created_at = Column(DateTime, default=datetime.utcnow)
     confirmed_at = Column(DateTime)
     
     # Relationships
     user = relationship('User', back_populates='orders')
     items = relationship('OrderItem', back_populates='order', cascade='all, delete-orphan')
+    status_history = relationship('OrderStatusHistory', back_populates='order', cascade='all, delete-orphan',
+                                  order_by='OrderStatusHistory.id')
+    delivery = relationship('Delivery', back_populates='order', uselist=False, cascade='all, delete-orphan')
+    admin_messages = relationship('OrderAdminMessage', back_populates='order', cascade='all, delete-orphan')
+    
+    # Order history per user, status lists and date-range reports (single-store and multi-tenant mode)
+    __table_args__ = (
+        Index('ix_orders_user_created', 'user_id', 'created_at'),
+        Index('ix_orders_status_created', 'status', 'created_at'),
+        Index('ix_orders_tenant_status_created', 'tenant_id', 'status', 'created_at'),
+    )
 
     def __repr__(self):
         return f"<Order #{self.id} - ${self.total_amount} - {self.status}>"
 
 
+class OrderStatusHistory(Base):
+    """Append-only log of order status changes"""
+    __tablename__ = 'order_status_history'
+    
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
+    from_status = Column(String(50))  # None for the initial status
+    to_status = Column(String(50), nullable=False)
+    changed_by = Column(BigInteger)  # Telegram ID of the admin, None for the system
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    order = relationship('Order', back_populates='status_history')
+
+    def __repr__(self):
+        return f"<OrderStatusHistory #{self.order_id} {self.from_status} -> {self.to_status}>"
+
+
+class OrderAdminMessage(Base):
+    """Copy of an order notification in one admin's chat, kept in sync with the order"""
+    __tablename__ = 'order_admin_messages'
+    
+    order_id = Column(Integer, ForeignKey('orders.id'), primary_key=True, autoincrement=False)
+    chat_id = Column(BigInteger, primary_key=True, autoincrement=False)  # Telegram ID of the admin
+    message_id = Column(Integer, primary_key=True, autoincrement=False)  # /pending can send an admin more copies
+    
+    # Relationships
+    order = relationship('Order', back_populates='admin_messages')
+
+    def __repr__(self):
+        return f"<OrderAdminMessage #{self.order_id} -> {self.chat_id}:{self.message_id}>"
+
+
+class Delivery(TenantMixin, Base):
+    """Courier assignment of a confirmed order"""
+    __tablename__ = 'deliveries'
+    
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, unique=True)
+    courier_id = Column(BigInteger, nullable=False)  # Telegram ID of the courier
+    stop = Column(Integer, nullable=False)  # Position in the courier's route, from 1
+    assigned_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime)
+    
+    # Relationships
+    order = relationship('Order', back_populates='delivery')
+    
+    # A courier's open route, in stop order
+    __table_args__ = (
+        Index('ix_deliveries_courier_open', 'courier_id', 'delivered_at', 'stop'),
+    )
+
+    def __repr__(self):
+        return f"<Delivery #{self.order_id} -> {self.courier_id} stop {self.stop}>"
+
+
 class OrderItem(Base):
     """Order items (products in an order)"""
     __tablename__ = 'order_items'
     
     id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
     variant_id = Column(Integer, ForeignKey('product_variants.id'), nullable=False)
     quantity = Column(Integer, nullable=False)
     price_at_purchase = Column(Float, nullable=False)  # Store price at time of order
@@ -149,4 +258,83 @@ class OrderItem(Base):
 
     def __repr__(self):
         return f"<OrderItem {self.product_name} - {self.variant_name} x{self.quantity}>"
-    
\ No newline at end of file
+
+
+class GeocodeCache(Base):
+    """Reverse geocoding results keyed by rounded coordinates"""
+    __tablename__ = 'geocode_cache'
+    
+    # Coordinates rounded to GEOCODE_PRECISION decimals, stored as scaled integers
+    lat_key = Column(Integer, primary_key=True, autoincrement=False)
+    lon_key = Column(Integer, primary_key=True, autoincrement=False)
+    address = Column(String(500), nullable=False)
+    provider = Column(String(50))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<GeocodeCache {self.lat_key},{self.lon_key} - {self.address}>"
+
+
+class CartReminder(Base):
+    """Last abandoned-cart reminder sent to a user"""
+    __tablename__ = 'cart_reminders'
+    
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    reminded_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<CartReminder User:{self.user_id} at {self.reminded_at}>"
+
+
+class JobState(Base):
+    """Progress of a background job, kept across restarts"""
+    __tablename__ = 'job_state'
+    
+    name = Column(String(100), primary_key=True)
+    cursor = Column(String(200))  # Job specific position, e.g. a keyset anchor
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<JobState {self.name} - {self.cursor}>"
+
+
+
+class ProcessedUpdate(Base):
+    """Telegram update or callback query already handled, so a re-delivery can be skipped"""
+    __tablename__ = 'processed_updates'
+    
+    key = Column(String(100), primary_key=True)  # 'u<update_id>' or 'c<callback query id>'
+    processed_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<ProcessedUpdate {self.key}>"
+
+
+class Admin(TenantMixin, Base):
+    """Admin added at runtime with /addadmin; ADMIN_IDS from the environment are admins as well"""
+    __tablename__ = 'admins'
+    
+    telegram_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    tenant_id = Column(String(50), primary_key=True, server_default=DEFAULT_TENANT, default=lambda: current_tenant.get())
+    added_by = Column(BigInteger)  # Telegram ID of the admin who added them
+    added_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Admin {self.telegram_id}>"
+
+
+# Bump whenever a table, column or index changes: init_db only checks the schema when the stored
+# version differs. It creates missing tables, adds missing columns (nullable or with a server
+# default) and indexes, and drops indexes the models no longer define.
+SCHEMA_VERSION = 7
+
+
+class SchemaVersion(Base):
+    """Schema version the database was last initialized with"""
+    __tablename__ = 'schema_version'
+    
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<SchemaVersion {self.version}>"
@@ -1,17 +1,142 @@
+from collections import namedtuple, defaultdict
+from sqlalchemy import tuple_, func
 from sqlalchemy.orm import Session
-from database.models import User, Category, Product, ProductVariant, CartItem, Order, OrderItem
+from database.models import (
+    User, Category, Product, ProductVariant, CartItem, Order, OrderItem,
+    OrderStatus, OrderStatusHistory, ORDER_TRANSITIONS, OrderAdminMessage, Delivery, GeocodeCache,
+    CartReminder, JobState, ProcessedUpdate, Admin
+)
+from database.views import (
+    CategoryView, ProductView, VariantView, CartLineView, UserView, CustomerView, OrderItemView, OrderView,
+    DispatchOrderView, RouteStopView
+)
 from datetime import datetime
 
 
+# One page of keyset-paginated rows
+Page = namedtuple('Page', ['items', 'has_prev', 'has_next'])
+
+
+def _keyset(query, model, sort_columns, limit=None, after_id=None, before_id=None, start_id=None):
+    """
+    Apply keyset pagination over (sort columns, id)
+    Rows are located relative to an anchor row instead of skipped with OFFSET,
+    so a deep page costs the same as the first one
+    """
+    key_columns = [*sort_columns, model.id]
+    anchor_id = next((i for i in (after_id, before_id, start_id) if i is not None), None)
+    backwards = False
+    
+    if anchor_id is not None:
+        anchor = query.session.query(*key_columns).filter(model.id == anchor_id).first()
+        if anchor is not None:
+            key, anchor_key = tuple_(*key_columns), tuple_(*anchor)
+            if after_id is not None:
+                query = query.filter(key > anchor_key)
+            elif before_id is not None:
+                query = query.filter(key < anchor_key)
+                backwards = True
+            else:
+                query = query.filter(key >= anchor_key)
+    
+    if backwards:
+        query = query.order_by(*[column.desc() for column in key_columns])
+    else:
+        query = query.order_by(*key_columns)
+    
+    if limit is not None:
+        query = query.limit(limit)
+    
+    rows = query.all()
+    if backwards:
+        rows.reverse()
+    return rows
+
+
+# Column lists the views are built from, in field order
+CATEGORY_VIEW_COLUMNS = (Category.id, Category.name)
+PRODUCT_VIEW_COLUMNS = (Product.id, Product.category_id, Product.name)
+VARIANT_VIEW_COLUMNS = (
+    ProductVariant.id, ProductVariant.product_id, ProductVariant.name, ProductVariant.description,
+    ProductVariant.price, ProductVariant.image_file_id
+)
+ORDER_VIEW_COLUMNS = (
+    Order.id, Order.status, Order.total_amount, Order.note, Order.location_latitude,
+    Order.location_longitude, Order.location_address, Order.created_at, Order.rendered_body
+)
+USER_VIEW_COLUMNS = (User.id, User.telegram_id, User.phone_number, User.username, User.first_name, User.last_name)
+CUSTOMER_VIEW_COLUMNS = USER_VIEW_COLUMNS[1:]
+DISPATCH_ORDER_VIEW_COLUMNS = (Order.id, Order.location_latitude, Order.location_longitude)
+
+
+def _order_views(session: Session, *criteria, order_by=(), limit=None):
+    """
+    Orders with their customer and items as views: one query for the orders, one for the items
+    of those whose message body has not been rendered yet
+    """
+    rows = session.query(*ORDER_VIEW_COLUMNS, *CUSTOMER_VIEW_COLUMNS).join(User, Order.user_id == User.id).filter(
+        *criteria
+    ).order_by(*order_by).limit(limit).all()
+    
+    items = defaultdict(list)
+    unrendered = [row.id for row in rows if row.rendered_body is None]
+    if unrendered:
+        for order_id, *fields in session.query(
+            OrderItem.order_id, OrderItem.product_name, OrderItem.variant_name,
+            OrderItem.price_at_purchase, OrderItem.quantity
+        ).filter(OrderItem.order_id.in_(unrendered)).order_by(OrderItem.id):
+            items[order_id].append(OrderItemView(*fields))
+    
+    split = len(ORDER_VIEW_COLUMNS)
+    return [
+        OrderView(*row[:split], customer=CustomerView(*row[split:]), items=tuple(items[row.id]))
+        for row in rows
+    ]
+
+
+def _finish(session: Session, commit: bool):
+    """Commit now, or only flush when the caller (e.g. the write coordinator) commits a batch"""
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+
+
+def _keyset_page(fetch, limit, after_id=None, before_id=None, start_id=None):
+    """Fetch one extra row to find out whether another page exists"""
+    rows = fetch(limit=limit + 1, after_id=after_id, before_id=before_id, start_id=start_id)
+    
+    if before_id is not None:
+        has_more = len(rows) > limit
+        return Page(rows[-limit:], has_more, True)
+    
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    if after_id is not None:
+        has_prev = True
+    elif start_id is not None and rows:
+        has_prev = bool(fetch(limit=1, before_id=rows[0].id))
+    else:
+        has_prev = False
+    return Page(rows, has_prev, has_next)
+
+
 class UserRepository:
     """User database operations"""
     
     @staticmethod
     def get_by_telegram_id(session: Session, telegram_id: int):
-        return session.query(User).filter(User.telegram_id == telegram_id).first()
+        row = session.query(*USER_VIEW_COLUMNS).filter(User.telegram_id == telegram_id).first()
+        return UserView(*row) if row else None
+    
+    @staticmethod
+    def get_telegram_ids(session: Session, user_ids):
+        """{user id: telegram id}"""
+        return dict(session.query(User.id, User.telegram_id).filter(User.id.in_(user_ids)).all())
     
     @staticmethod
-    def create(session: Session, telegram_id: int, phone_number: str, username=None, first_name=None, last_name=None):
+    def create(session: Session, telegram_id: int, phone_number: str, username=None, first_name=None, last_name=None,
+               commit: bool = True):
         user = User(
             telegram_id=telegram_id,
             phone_number=phone_number,
@@ -20,7 +145,7 @@ class UserRepository:
             last_name=last_name
         )
         session.add(user)
-        session.commit()
+        _finish(session, commit)
         return user
 
 
@@ -28,27 +153,47 @@ class CategoryRepository:
     """Category database operations"""
     
     @staticmethod
-    def get_all_active(session: Session):
-        return session.query(Category).filter(Category.is_active == True).order_by(Category.order, Category.name).all()
+    def get_all_active(session: Session, limit=None, after_id=None, before_id=None, start_id=None):
+        query = session.query(*CATEGORY_VIEW_COLUMNS).filter(Category.is_active == True)
+        rows = _keyset(query, Category, [Category.order, Category.name], limit, after_id, before_id, start_id)
+        return [CategoryView(*row) for row in rows]
+    
+    @staticmethod
+    def get_active_page(session: Session, limit: int, after_id=None, before_id=None, start_id=None):
+        """Get one page of active categories"""
+        def fetch(**kwargs):
+            return CategoryRepository.get_all_active(session, **kwargs)
+        return _keyset_page(fetch, limit, after_id, before_id, start_id)
     
     @staticmethod
     def get_by_id(session: Session, category_id: int):
-        return session.query(Category).filter(Category.id == category_id).first()
+        row = session.query(*CATEGORY_VIEW_COLUMNS).filter(Category.id == category_id).first()
+        return CategoryView(*row) if row else None
 
 
 class ProductRepository:
     """Product database operations"""
     
     @staticmethod
-    def get_by_category(session: Session, category_id: int):
-        return session.query(Product).filter(
+    def get_by_category(session: Session, category_id: int, limit=None, after_id=None, before_id=None, start_id=None):
+        query = session.query(*PRODUCT_VIEW_COLUMNS).filter(
             Product.category_id == category_id,
             Product.is_active == True
-        ).order_by(Product.order, Product.name).all()
+        )
+        rows = _keyset(query, Product, [Product.order, Product.name], limit, after_id, before_id, start_id)
+        return [ProductView(*row) for row in rows]
+    
+    @staticmethod
+    def get_page_by_category(session: Session, category_id: int, limit: int, after_id=None, before_id=None, start_id=None):
+        """Get one page of active products in a category"""
+        def fetch(**kwargs):
+            return ProductRepository.get_by_category(session, category_id, **kwargs)
+        return _keyset_page(fetch, limit, after_id, before_id, start_id)
     
     @staticmethod
     def get_by_id(session: Session, product_id: int):
-        return session.query(Product).filter(Product.id == product_id).first()
+        row = session.query(*PRODUCT_VIEW_COLUMNS).filter(Product.id == product_id).first()
+        return ProductView(*row) if row else None
 
 
 class VariantRepository:
@@ -56,14 +201,16 @@ class VariantRepository:
     
     @staticmethod
     def get_by_product(session: Session, product_id: int):
-        return session.query(ProductVariant).filter(
+        rows = session.query(*VARIANT_VIEW_COLUMNS).filter(
             ProductVariant.product_id == product_id,
             ProductVariant.is_active == True
         ).order_by(ProductVariant.order, ProductVariant.name).all()
+        return [VariantView(*row) for row in rows]
     
     @staticmethod
     def get_by_id(session: Session, variant_id: int):
-        return session.query(ProductVariant).filter(ProductVariant.id == variant_id).first()
+        row = session.query(*VARIANT_VIEW_COLUMNS).filter(ProductVariant.id == variant_id).first()
+        return VariantView(*row) if row else None
 
 
 class CartRepository:
@@ -74,8 +221,22 @@ class CartRepository:
         return session.query(CartItem).filter(CartItem.user_id == user_id).all()
     
     @staticmethod
-    def add_item(session: Session, user_id: int, variant_id: int):
+    def get_cart_lines(session: Session, user_id: int):
+        """User's cart as views, with product and variant names joined in"""
+        rows = session.query(
+            CartItem.variant_id, Product.name, ProductVariant.name, ProductVariant.price, CartItem.quantity
+        ).join(ProductVariant, CartItem.variant_id == ProductVariant.id).join(
+            Product, ProductVariant.product_id == Product.id
+        ).filter(CartItem.user_id == user_id).order_by(CartItem.id).all()
+        return [CartLineView(*row) for row in rows]
+    
+    @staticmethod
+    def add_item(session: Session, user_id: int, variant_id: int, commit: bool = True):
         """Add item to cart or increase quantity if already exists"""
+        # The lookup is tenant-scoped, so another store's variant counts as missing
+        if session.query(ProductVariant.id).filter(ProductVariant.id == variant_id).first() is None:
+            raise ValueError(f"Product variant {variant_id} not found")
+
         cart_item = session.query(CartItem).filter(
             CartItem.user_id == user_id,
             CartItem.variant_id == variant_id
@@ -87,13 +248,32 @@ class CartRepository:
             cart_item = CartItem(user_id=user_id, variant_id=variant_id, quantity=1)
             session.add(cart_item)
         
-        session.commit()
+        _finish(session, commit)
         return cart_item
     
     @staticmethod
-    def clear_cart(session: Session, user_id: int):
+    def clear_cart(session: Session, user_id: int, commit: bool = True):
         session.query(CartItem).filter(CartItem.user_id == user_id).delete()
-        session.commit()
+        _finish(session, commit)
+    
+    @staticmethod
+    def get_stale_items(session: Session, after, before, limit: int):
+        """
+        (created_at, id, user_id) of cart items added in the window, oldest first
+        after is an exclusive (created_at, id) keyset anchor; served by ix_cart_items_created
+        (ix_cart_items_tenant_created in multi-tenant mode)
+        """
+        return session.query(CartItem.created_at, CartItem.id, CartItem.user_id).filter(
+            tuple_(CartItem.created_at, CartItem.id) > tuple_(*after),
+            CartItem.created_at < before
+        ).order_by(CartItem.created_at, CartItem.id).limit(limit).all()
+    
+    @staticmethod
+    def get_last_added(session: Session, user_ids):
+        """When each user last added something to their cart"""
+        return dict(session.query(CartItem.user_id, func.max(CartItem.created_at)).filter(
+            CartItem.user_id.in_(user_ids)
+        ).group_by(CartItem.user_id).all())
     
     @staticmethod
     def get_cart_total(session: Session, user_id: int):
@@ -107,7 +287,7 @@ class OrderRepository:
     
     @staticmethod
     def create_order(session: Session, user_id: int, cart_items, note=None, 
-                    location_lat=None, location_lon=None, location_address=None):
+                    location_lat=None, location_lon=None, location_address=None, commit: bool = True):
         """Create order from cart items"""
         total = sum(item.quantity * item.variant.price for item in cart_items)
         
@@ -118,11 +298,13 @@ class OrderRepository:
             location_latitude=location_lat,
             location_longitude=location_lon,
             location_address=location_address,
-            status='pending'
+            status=OrderStatus.PENDING
         )
         session.add(order)
         session.flush()  # Get order ID
         
+        session.add(OrderStatusHistory(order_id=order.id, to_status=OrderStatus.PENDING))
+        
         # Create order items
         for cart_item in cart_items:
             order_item = OrderItem(
@@ -135,7 +317,23 @@ class OrderRepository:
             )
             session.add(order_item)
         
-        session.commit()
+        _finish(session, commit)
+        return order
+    
+    @staticmethod
+    def create_order_from_cart(session: Session, user_id: int, note=None,
+                               location_lat=None, location_lon=None, commit: bool = True):
+        """Turn the user's cart into an order and empty it in one transaction; None if the cart is empty"""
+        cart_items = CartRepository.get_user_cart(session, user_id)
+        if not cart_items:
+            return None
+        
+        order = OrderRepository.create_order(
+            session, user_id, cart_items, note=note,
+            location_lat=location_lat, location_lon=location_lon, commit=False
+        )
+        CartRepository.clear_cart(session, user_id, commit=False)
+        _finish(session, commit)
         return order
     
     @staticmethod
@@ -143,26 +341,270 @@ class OrderRepository:
         return session.query(Order).filter(Order.id == order_id).first()
     
     @staticmethod
-    def update_status(session: Session, order_id: int, status: str):
-        order = OrderRepository.get_by_id(session, order_id)
-        if order:
-            order.status = status
-            if status == 'confirmed':
-                order.confirmed_at = datetime.utcnow()
-            session.commit()
-        return order
+    def get_view(session: Session, order_id: int):
+        """Order with its customer and items, for formatting"""
+        views = _order_views(session, Order.id == order_id)
+        return views[0] if views else None
+    
+    @staticmethod
+    def transition(session: Session, order_id: int, from_status: str, to_status: str, changed_by=None,
+                   commit: bool = True) -> bool:
+        """
+        Move an order from one status to another with a single conditional UPDATE
+        Returns False when the order is no longer in from_status (e.g. another admin got there first)
+        """
+        if to_status not in ORDER_TRANSITIONS.get(from_status, ()):
+            raise ValueError(f"Order status cannot change from {from_status} to {to_status}")
+        
+        values = {Order.status: to_status}
+        if to_status == OrderStatus.CONFIRMED:
+            values[Order.confirmed_at] = datetime.utcnow()
+        
+        updated = session.query(Order).filter(
+            Order.id == order_id,
+            Order.status == from_status
+        ).update(values, synchronize_session=False)
+        
+        if updated:
+            session.add(OrderStatusHistory(
+                order_id=order_id,
+                from_status=from_status,
+                to_status=to_status,
+                changed_by=changed_by
+            ))
+        _finish(session, commit)
+        return updated == 1
     
     @staticmethod
-    def update_message_ids(session: Session, order_id: int, admin_msg_id=None, channel_msg_id=None):
+    def update_message_ids(session: Session, order_id: int, admin_msg_id=None, channel_msg_id=None,
+                           commit: bool = True):
         order = OrderRepository.get_by_id(session, order_id)
         if order:
             if admin_msg_id:
                 order.admin_message_id = admin_msg_id
             if channel_msg_id:
                 order.channel_message_id = channel_msg_id
-            session.commit()
+            _finish(session, commit)
         return order
     
     @staticmethod
-    def get_user_orders(session: Session, user_id: int):
-        return session.query(Order).filter(Order.user_id == user_id).order_by(Order.created_at.desc()).all()
\ No newline at end of file
+    def add_admin_messages(session: Session, messages, commit: bool = True):
+        """Remember admin copies of order notifications, as (order id, chat id, message id)"""
+        for order_id, chat_id, message_id in messages:
+            session.merge(OrderAdminMessage(order_id=order_id, chat_id=chat_id, message_id=message_id))
+        _finish(session, commit)
+    
+    @staticmethod
+    def get_admin_messages(session: Session, order_id: int):
+        """(chat id, message id) of every admin copy of an order notification"""
+        return [tuple(row) for row in session.query(OrderAdminMessage.chat_id, OrderAdminMessage.message_id).filter(
+            OrderAdminMessage.order_id == order_id
+        )]
+    
+    @staticmethod
+    def set_address(session: Session, order_id: int, address: str, commit: bool = True):
+        """Fill in the resolved delivery address; the rendered body no longer matches, so it is dropped"""
+        session.query(Order).filter(Order.id == order_id).update(
+            {Order.location_address: address, Order.rendered_body: None}, synchronize_session=False
+        )
+        _finish(session, commit)
+    
+    @staticmethod
+    def set_rendered_body(session: Session, order_id: int, body: str, commit: bool = True):
+        session.query(Order).filter(Order.id == order_id).update(
+            {Order.rendered_body: body}, synchronize_session=False
+        )
+        _finish(session, commit)
+    
+    @staticmethod
+    def get_user_orders(session: Session, user_id: int, limit=None):
+        return _order_views(session, Order.user_id == user_id, order_by=(Order.created_at.desc(),), limit=limit)
+    
+    @staticmethod
+    def get_by_status(session: Session, status: str):
+        """Orders in a status as views, newest first"""
+        return _order_views(session, Order.status == status, order_by=(Order.created_at.desc(),))
+    
+    @staticmethod
+    def count_user_orders(session: Session, user_id: int):
+        return session.query(func.count(Order.id)).filter(Order.user_id == user_id).scalar()
+    
+    @staticmethod
+    def get_awaiting_dispatch(session: Session):
+        """Confirmed orders with a location that no courier has been assigned yet"""
+        rows = session.query(*DISPATCH_ORDER_VIEW_COLUMNS).outerjoin(Delivery).filter(
+            Order.status == OrderStatus.CONFIRMED,
+            Order.location_latitude.isnot(None),
+            Order.location_longitude.isnot(None),
+            Delivery.id.is_(None)
+        ).order_by(Order.confirmed_at).all()
+        return [DispatchOrderView(*row) for row in rows]
+
+
+class DeliveryRepository:
+    """Courier assignment operations"""
+    
+    @staticmethod
+    def get_open_stops(session: Session, courier_ids):
+        """Number of undelivered stops per courier"""
+        rows = session.query(Delivery.courier_id, func.count(Delivery.id)).filter(
+            Delivery.courier_id.in_(courier_ids),
+            Delivery.delivered_at.is_(None)
+        ).group_by(Delivery.courier_id).all()
+        return dict(rows)
+    
+    @staticmethod
+    def get_open_route(session: Session, courier_id: int):
+        """Courier's undelivered stops in route order, with their orders"""
+        stops = session.query(Delivery.order_id, Delivery.stop).filter(
+            Delivery.courier_id == courier_id,
+            Delivery.delivered_at.is_(None)
+        ).order_by(Delivery.stop).all()
+        if not stops:
+            return []
+        orders = {order.id: order for order in _order_views(session, Order.id.in_([s.order_id for s in stops]))}
+        return [RouteStopView(order_id, stop, orders[order_id]) for order_id, stop in stops]
+    
+    @staticmethod
+    def assign(session: Session, routes, commit: bool = True):
+        """
+        Append planned stops to each courier's route
+        routes: {courier_id: [order_id, ...]} in visiting order
+        Orders assigned by a concurrent dispatch in the meantime are skipped
+        Returns {courier_id: number of stops added}
+        """
+        order_ids = [order_id for route in routes.values() for order_id in route]
+        taken = {
+            order_id for (order_id,) in
+            session.query(Delivery.order_id).filter(Delivery.order_id.in_(order_ids))
+        }
+        last_stops = dict(session.query(Delivery.courier_id, func.max(Delivery.stop)).filter(
+            Delivery.courier_id.in_(list(routes))
+        ).group_by(Delivery.courier_id).all())
+        
+        assigned = {}
+        for courier_id, route in routes.items():
+            stop = last_stops.get(courier_id) or 0
+            for order_id in route:
+                if order_id in taken:
+                    continue
+                stop += 1
+                session.add(Delivery(order_id=order_id, courier_id=courier_id, stop=stop))
+                assigned[courier_id] = assigned.get(courier_id, 0) + 1
+        _finish(session, commit)
+        return assigned
+    
+    @staticmethod
+    def mark_delivered(session: Session, order_id: int, courier_id: int, commit: bool = True) -> bool:
+        """Close a courier's stop and move the order to delivered; False if it is not theirs to close"""
+        delivery = session.query(Delivery).filter(
+            Delivery.order_id == order_id,
+            Delivery.courier_id == courier_id,
+            Delivery.delivered_at.is_(None)
+        ).first()
+        if not delivery:
+            return False
+        
+        if not OrderRepository.transition(session, order_id, OrderStatus.CONFIRMED, OrderStatus.DELIVERED,
+                                          changed_by=courier_id, commit=False):
+            return False
+        delivery.delivered_at = datetime.utcnow()
+        _finish(session, commit)
+        return True
+
+
+class GeocodeRepository:
+    """Reverse geocoding cache operations"""
+    
+    @staticmethod
+    def get(session: Session, lat_key: int, lon_key: int):
+        entry = session.get(GeocodeCache, (lat_key, lon_key))
+        return entry.address if entry else None
+    
+    @staticmethod
+    def put(session: Session, lat_key: int, lon_key: int, address: str, provider=None, commit: bool = True):
+        """Store a resolved address; a concurrent insert of the same key wins"""
+        if session.get(GeocodeCache, (lat_key, lon_key)) is None:
+            session.add(GeocodeCache(lat_key=lat_key, lon_key=lon_key, address=address, provider=provider))
+        _finish(session, commit)
+
+
+class ReminderRepository:
+    """Abandoned-cart reminder bookkeeping"""
+    
+    @staticmethod
+    def get_cursor(session: Session, job: str):
+        state = session.get(JobState, job)
+        return state.cursor if state else None
+    
+    @staticmethod
+    def get_last_reminders(session: Session, user_ids):
+        return dict(session.query(CartReminder.user_id, CartReminder.reminded_at).filter(
+            CartReminder.user_id.in_(user_ids)
+        ).all())
+    
+    @staticmethod
+    def record(session: Session, user_ids, reminded_at, job: str, cursor: str, commit: bool = True):
+        """Mark users as reminded and advance the job cursor in one transaction"""
+        for user_id in user_ids:
+            session.merge(CartReminder(user_id=user_id, reminded_at=reminded_at))
+        session.merge(JobState(name=job, cursor=cursor))
+        _finish(session, commit)
+
+
+class UpdateLedgerRepository:
+    """Processed update keys, kept for a while to skip re-delivered updates"""
+    
+    @staticmethod
+    def get_keys_since(session: Session, since: datetime, limit: int = None):
+        """Keys processed since the cutoff, oldest first; with a limit, only the newest ones"""
+        rows = session.query(ProcessedUpdate.key).filter(ProcessedUpdate.processed_at >= since).order_by(
+            ProcessedUpdate.processed_at.desc()
+        ).limit(limit).all()
+        return [key for (key,) in reversed(rows)]
+    
+    @staticmethod
+    def record(session: Session, keys, processed_at: datetime, commit: bool = True):
+        """Add keys to the ledger; keys already in it are left alone"""
+        existing = {key for (key,) in session.query(ProcessedUpdate.key).filter(ProcessedUpdate.key.in_(keys))}
+        session.add_all([
+            ProcessedUpdate(key=key, processed_at=processed_at) for key in dict.fromkeys(keys) if key not in existing
+        ])
+        _finish(session, commit)
+    
+    @staticmethod
+    def purge(session: Session, before: datetime, commit: bool = True):
+        """Forget keys processed before the cutoff; returns the number removed"""
+        removed = session.query(ProcessedUpdate).filter(
+            ProcessedUpdate.processed_at < before
+        ).delete(synchronize_session=False)
+        _finish(session, commit)
+        return removed
+
+
+class AdminRepository:
+    """Admins added at runtime"""
+    
+    @staticmethod
+    def get_ids_by_tenant(session: Session):
+        """Admin Telegram ids per tenant (all tenants when the session is unscoped)"""
+        admins = defaultdict(set)
+        for tenant_id, telegram_id in session.query(Admin.tenant_id, Admin.telegram_id):
+            admins[tenant_id].add(telegram_id)
+        return admins
+    
+    @staticmethod
+    def add(session: Session, telegram_id: int, added_by: int = None, commit: bool = True) -> bool:
+        """Returns False when they already are an admin"""
+        if session.query(Admin.telegram_id).filter(Admin.telegram_id == telegram_id).first() is not None:
+            return False
+        session.add(Admin(telegram_id=telegram_id, added_by=added_by))
+        _finish(session, commit)
+        return True
+    
+    @staticmethod
+    def remove(session: Session, telegram_id: int, commit: bool = True) -> bool:
+        """Returns False when they were not an admin"""
+        removed = session.query(Admin).filter(Admin.telegram_id == telegram_id).delete(synchronize_session=False)
+        _finish(session, commit)
+        return bool(removed)
@@ -0,0 +1,112 @@
+from datetime import datetime
+from sqlalchemy import select, func, and_, true
+from sqlalchemy.orm import Session
+from database.models import User, Order, OrderItem, OrderStatus
+
+# Statuses that count as sales in reports
+SALE_STATUSES = (OrderStatus.CONFIRMED, OrderStatus.DELIVERED)
+
+ORDER_COLUMNS = (
+    'order_id', 'created_at', 'confirmed_at', 'status', 'total_amount', 'telegram_id', 'phone_number',
+    'username', 'note', 'location_latitude', 'location_longitude', 'location_address'
+)
+ITEM_COLUMNS = (
+    'order_id', 'created_at', 'status', 'variant_id', 'product_name', 'variant_name', 'quantity',
+    'price_at_purchase', 'line_total'
+)
+
+
+def _order_filters(start: datetime = None, end: datetime = None, statuses=None):
+    """Filters on orders; end is exclusive"""
+    filters = []
+    if start:
+        filters.append(Order.created_at >= start)
+    if end:
+        filters.append(Order.created_at < end)
+    if statuses:
+        filters.append(Order.status.in_(statuses))
+    return and_(true(), *filters)
+
+
+class ReportRepository:
+    """Exports and aggregate reports over orders"""
+
+    @staticmethod
+    def iter_orders(session: Session, start=None, end=None, statuses=None, chunk_size: int = 1000):
+        """Stream order rows (ORDER_COLUMNS) in chunks, using a server-side cursor where supported"""
+        stmt = select(
+            Order.id, Order.created_at, Order.confirmed_at, Order.status, Order.total_amount,
+            User.telegram_id, User.phone_number, User.username, Order.note,
+            Order.location_latitude, Order.location_longitude, Order.location_address
+        ).join(User, Order.user_id == User.id).where(
+            _order_filters(start, end, statuses)
+        ).order_by(Order.id)
+        result = session.execute(stmt.execution_options(yield_per=chunk_size))
+        yield from result.partitions()
+
+    @staticmethod
+    def iter_order_items(session: Session, start=None, end=None, statuses=None, chunk_size: int = 1000):
+        """Stream order item rows (ITEM_COLUMNS) in chunks, using a server-side cursor where supported"""
+        stmt = select(
+            Order.id, Order.created_at, Order.status, OrderItem.variant_id, OrderItem.product_name,
+            OrderItem.variant_name, OrderItem.quantity, OrderItem.price_at_purchase,
+            OrderItem.quantity * OrderItem.price_at_purchase
+        ).join(OrderItem, OrderItem.order_id == Order.id).where(
+            _order_filters(start, end, statuses)
+        ).order_by(Order.id, OrderItem.id)
+        result = session.execute(stmt.execution_options(yield_per=chunk_size))
+        yield from result.partitions()
+
+    @staticmethod
+    def revenue_by_day(session: Session, start=None, end=None, statuses=SALE_STATUSES):
+        """(day, orders, revenue) per day, aggregated by the database"""
+        day = func.date(Order.created_at)
+        return session.execute(
+            select(day, func.count(Order.id), func.sum(Order.total_amount))
+            .where(_order_filters(start, end, statuses))
+            .group_by(day)
+            .order_by(day)
+        ).all()
+
+    @staticmethod
+    def top_variants(session: Session, start=None, end=None, statuses=SALE_STATUSES, limit: int = 10):
+        """(product, variant, quantity, revenue) of the best selling variants"""
+        quantity = func.sum(OrderItem.quantity)
+        return session.execute(
+            select(
+                func.max(OrderItem.product_name), func.max(OrderItem.variant_name), quantity,
+                func.sum(OrderItem.quantity * OrderItem.price_at_purchase)
+            )
+            .join(Order, OrderItem.order_id == Order.id)
+            .where(_order_filters(start, end, statuses))
+            .group_by(OrderItem.variant_id)
+            .order_by(quantity.desc())
+            .limit(limit)
+        ).all()
+
+    @staticmethod
+    def repeat_customers(session: Session, start=None, end=None, statuses=SALE_STATUSES):
+        """
+        Customer retention in the period: (customers, repeat customers, revenue, repeat revenue)
+        A repeat customer placed two or more orders
+        """
+        per_user = (
+            select(
+                Order.user_id,
+                func.count(Order.id).label('orders'),
+                func.sum(Order.total_amount).label('revenue')
+            )
+            .where(_order_filters(start, end, statuses))
+            .group_by(Order.user_id)
+            .subquery()
+        )
+        is_repeat = per_user.c.orders >= 2
+        row = session.execute(
+            select(
+                func.count(),
+                func.count().filter(is_repeat),
+                func.coalesce(func.sum(per_user.c.revenue), 0),
+                func.coalesce(func.sum(per_user.c.revenue).filter(is_repeat), 0)
+            ).select_from(per_user)
+        ).one()
+        return tuple(row)
@@ -0,0 +1,53 @@
+"""
+Tenants: several stores sharing one database
+Rows of store-owned tables carry a tenant_id and new rows get current_tenant, so
+repositories need no tenant argument. Once scope_queries() is called (multi-tenant mode),
+every ORM query of a session (reads, bulk updates and deletes) is filtered to
+current_tenant too. A single-store deployment skips the filter: all its rows are
+DEFAULT_TENANT's, so it would only cost time on every query.
+"""
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import Column, String, event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+DEFAULT_TENANT = 'default'
+
+# Tenant of the update being handled; None lifts the filter (maintenance across all stores)
+current_tenant: ContextVar[Optional[str]] = ContextVar('current_tenant', default=DEFAULT_TENANT)
+
+
+class TenantMixin:
+    """Mixed into the models whose rows belong to one store"""
+    tenant_id = Column(
+        String(50), nullable=False, server_default=DEFAULT_TENANT, default=lambda: current_tenant.get()
+    )
+
+
+def _scope_to_tenant(execute_state):
+    tenant = current_tenant.get()
+    if tenant is None or execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(TenantMixin, lambda cls: cls.tenant_id == tenant, include_aliases=True)
+    )
+
+
+def scope_queries():
+    """Filter every ORM query to current_tenant from now on"""
+    if not event.contains(Session, 'do_orm_execute', _scope_to_tenant):
+        event.listen(Session, 'do_orm_execute', _scope_to_tenant)
+
+
+def for_tenant(tenant: Optional[str], job):
+    """Wrap a coroutine function so it runs scoped to a tenant (None: unscoped)"""
+    async def run(*args, **kwargs):
+        token = current_tenant.set(tenant)
+        try:
+            return await job(*args, **kwargs)
+        finally:
+            current_tenant.reset(token)
+
+    run.__name__ = job.__name__
+    return run
@@ -0,0 +1,100 @@
+"""
+Read-only views returned by the repositories' read paths
+Built from column-only selects, so they hold plain values: no lazy loads, no session needed
+after the query, and a fraction of the memory of an ORM instance.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryView:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class ProductView:
+    id: int
+    category_id: int
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class VariantView:
+    id: int
+    product_id: int
+    name: str
+    description: Optional[str]
+    price: float
+    image_file_id: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class CartLineView:
+    variant_id: int
+    product_name: str
+    variant_name: str
+    price: float
+    quantity: int
+
+    @property
+    def subtotal(self) -> float:
+        return self.price * self.quantity
+
+
+@dataclass(frozen=True, slots=True)
+class UserView:
+    id: int
+    telegram_id: int
+    phone_number: str
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class CustomerView:
+    telegram_id: int
+    phone_number: str
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class OrderItemView:
+    product_name: str
+    variant_name: str
+    price_at_purchase: float
+    quantity: int
+
+
+@dataclass(frozen=True, slots=True)
+class OrderView:
+    id: int
+    status: str
+    total_amount: float
+    note: Optional[str]
+    location_latitude: Optional[float]
+    location_longitude: Optional[float]
+    location_address: Optional[str]
+    created_at: datetime
+    rendered_body: Optional[str]
+    customer: CustomerView
+    items: Tuple[OrderItemView, ...] = ()  # Not loaded when the body is already rendered
+
+
+@dataclass(frozen=True, slots=True)
+class DispatchOrderView:
+    id: int
+    location_latitude: float
+    location_longitude: float
+
+
+@dataclass(frozen=True, slots=True)
+class RouteStopView:
+    order_id: int
+    stop: int
+    order: OrderView
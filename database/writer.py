@@ -0,0 +1,140 @@
+import asyncio
+import contextvars
+import logging
+import os
+from sqlalchemy.orm import sessionmaker
+from database.db import engine
+
+logger = logging.getLogger(__name__)
+
+# Group commit configuration
+WRITE_BATCH_WINDOW = float(os.getenv('WRITE_BATCH_WINDOW', '0.003'))  # Seconds to gather a batch
+WRITE_BATCH_SIZE = int(os.getenv('WRITE_BATCH_SIZE', '64'))  # Max operations per commit
+
+# Writes always go to the writer engine; objects stay readable after the batch commits
+WriteSessionFactory = sessionmaker(bind=engine, expire_on_commit=False)
+
+_STOP = object()
+
+
+class WriteCoordinator:
+    """
+    Single owner of database writes
+    Write operations are queued and executed in batches, one transaction and one
+    fsync per batch, so throughput grows with load instead of serializing on the lock.
+
+    An operation is a callable `operation(session, *args, commit=False, **kwargs)`,
+    i.e. any repository write method. It runs in the context of the caller, so it is scoped
+    to the caller's tenant. Results come back detached: loaded columns can be read but
+    relationships cannot be lazy loaded, so reload through a session when needed.
+    """
+
+    def __init__(self, session_factory=WriteSessionFactory, window: float = WRITE_BATCH_WINDOW,
+                 max_batch: int = WRITE_BATCH_SIZE):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = None
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Start the writer task"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name='write-coordinator')
+
+    async def stop(self):
+        """Commit everything queued so far, then stop the writer task"""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(self, operation, *args, **kwargs):
+        """Queue a write operation and wait until its batch is committed"""
+        if not self.running:
+            # No writer task (scripts, tests): execute and commit right away
+            ok, value = self._execute([(operation, args, kwargs, None, contextvars.copy_context())])[0]
+            if not ok:
+                raise value
+            return value
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, args, kwargs, future, contextvars.copy_context()))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+
+            # Gather whatever else arrives within the batch window
+            batch = [item]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            # Run the blocking transaction off the event loop
+            results = await asyncio.to_thread(self._execute, batch)
+            for (_, _, _, future, _), (ok, value) in zip(batch, results):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _execute(self, batch):
+        """Run a batch in one transaction; each operation is isolated by a savepoint"""
+        session = self.session_factory()
+        results = []
+        try:
+            for operation, args, kwargs, _, context in batch:
+                try:
+                    results.append((True, context.run(self._apply, session, operation, args, kwargs)))
+                except Exception as e:
+                    results.append((False, e))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.exception("Write batch of %d operations failed", len(batch))
+            results = [(False, e)] * len(batch)
+        finally:
+            session.close()
+        return results
+
+    @staticmethod
+    def _apply(session, operation, args, kwargs):
+        # The savepoint flush runs in the operation's context too (column defaults read it)
+        with session.begin_nested():
+            return operation(session, *args, commit=False, **kwargs)
+
+
+write_coordinator = WriteCoordinator()
+
+
+async def run_write(operation, *args, **kwargs):
+    """Execute a repository write method through the write coordinator"""
+    return await write_coordinator.submit(operation, *args, **kwargs)
@@ -0,0 +1,44 @@
+"""
+Export orders and print sales reports from the command line
+Usage: python export.py orders|items [--format csv|parquet] [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+                                     [--status STATUS ...] [--output PATH]
+       python export.py report [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--status STATUS ...]
+"""
+import argparse
+import html
+import re
+from datetime import timedelta
+
+from utils.export import EXPORT_TABLES, EXPORT_FORMATS, STATUSES, ExportFilters, parse_date, export_orders, build_report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export orders and print sales reports")
+    parser.add_argument('what', choices=[*EXPORT_TABLES, 'report'], help="Table to export, or 'report'")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    parser.add_argument('--from', dest='start', type=parse_date, help="First day, inclusive")
+    parser.add_argument('--to', dest='end', type=parse_date, help="Last day, inclusive")
+    parser.add_argument('--status', action='append', choices=STATUSES, help="Repeat for several statuses")
+    parser.add_argument('--output', '-o', help="Output file, default <table>.<format>")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    filters = ExportFilters(args.start, args.end + timedelta(days=1) if args.end else None, args.status)
+
+    if args.what == 'report':
+        # The report is formatted for Telegram; strip the markup for the terminal
+        print(html.unescape(re.sub(r'<[^>]+>', '', build_report(filters))))
+        return
+
+    output = args.output or f"{args.what}.{args.format}"
+    try:
+        rows = export_orders(output, args.what, args.format, filters)
+    except RuntimeError as e:
+        raise SystemExit(f"❌ {e}")
+    print(f"✅ Exported {rows} {args.what} rows to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-from handlers import registration, catalog, cart, checkout, admin, orders
+from handlers import registration, catalog, cart, checkout, admin, delivery, orders, fallback
 
-__all__ = ['registration', 'catalog', 'cart', 'checkout', 'admin', 'orders']
\ No newline at end of file
+__all__ = ['registration', 'catalog', 'cart', 'checkout', 'admin', 'delivery', 'orders', 'fallback']
\ No newline at end of file
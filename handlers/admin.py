@@ -1,146 +1,144 @@
-from aiogram import Router, F, Bot
-from aiogram.types import CallbackQuery, Message
-from aiogram.filters import Command
+import asyncio
+import os
+import tempfile
+from aiogram import Router, Bot
+from aiogram.types import CallbackQuery, Message, FSInputFile
+from aiogram.filters import Command, CommandObject
 from sqlalchemy import func
 
-from database import get_session, OrderRepository
-from utils import is_admin, format_order_message, get_admin_keyboard
-from config import Messages, CHANNEL_ID
+from database import get_session, run_write, OrderRepository, AdminRepository, OrderStatus
+from database.reports import SALE_STATUSES
+from utils import format_order_message, get_order_view, split_message, get_admin_keyboard, AdminCallback, OrderAction
+from utils.admin_messages import sync_admin_messages
+from utils.events import event_bus, OrderConfirmed, OrderRejected
+from utils.export import parse_export_args, export_orders, build_report
+from utils.live_config import live_config, IsAdmin
+from config import Messages
 
+# Every handler of this router is for admins only
 router = Router()
+router.message.filter(IsAdmin())
+router.callback_query.filter(IsAdmin())
 
+# Answers the same commands and buttons for everyone else; included after `router`
+denied_router = Router()
 
-@router.callback_query(F.data.startswith("admin_confirm_"))
-async def confirm_order(callback: CallbackQuery, bot: Bot):
+ADMIN_COMMANDS = ("admin", "stats", "pending", "export", "report", "addadmin", "removeadmin")
+
+
+async def confirm_order(callback: CallbackQuery, callback_data: AdminCallback, bot: Bot):
     """Admin confirms order"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("❌ You are not authorized!", show_alert=True)
-        return
+    order_id = callback_data.order_id
     
-    order_id = int(callback.data.split("_")[2])
-    
-    session = get_session()
     try:
-        order = OrderRepository.get_by_id(session, order_id)
+        # Only the first admin to act moves the order out of pending
+        changed = await run_write(
+            OrderRepository.transition, order_id, OrderStatus.PENDING, OrderStatus.CONFIRMED,
+            changed_by=callback.from_user.id
+        )
+        order = get_order_view(order_id)
         
         if not order:
             await callback.answer("❌ Order not found!", show_alert=True)
             return
-        
-        if order.status != 'pending':
+        if not changed:
             await callback.answer(f"Order is already {order.status}!", show_alert=True)
             return
         
-        # Update order status
-        OrderRepository.update_status(session, order_id, 'confirmed')
-        
-        # Notify customer
-        try:
-            await bot.send_message(
-                order.user.telegram_id,
-                Messages.ORDER_CONFIRMED.format(order_id=order.id)
-            )
-        except Exception as e:
-            print(f"Error notifying customer: {e}")
-        
-        # Forward to channel if configured
-        if CHANNEL_ID:
-            try:
-                order_message = format_order_message(order)
-                channel_msg = await bot.send_message(
-                    CHANNEL_ID,
-                    f"✅ <b>CONFIRMED ORDER</b>\n\n{order_message}",
-                    parse_mode="HTML"
-                )
-                
-                # Send location to channel
-                if order.location_latitude and order.location_longitude:
-                    await bot.send_location(
-                        CHANNEL_ID,
-                        latitude=order.location_latitude,
-                        longitude=order.location_longitude
-                    )
-                
-                # Update order with channel message ID
-                OrderRepository.update_message_ids(session, order_id, channel_msg_id=channel_msg.message_id)
-                
-            except Exception as e:
-                print(f"Error forwarding to channel: {e}")
-        
-        # Update admin message
-        await callback.message.edit_text(
-            f"✅ <b>ORDER CONFIRMED</b>\n\n{format_order_message(order)}",
-            parse_mode="HTML"
-        )
+        # Admin copies, the customer and the channel are updated in the background
+        event_bus.publish(bot, OrderConfirmed(order, (callback.message.chat.id, callback.message.message_id)))
         
         await callback.answer("✅ Order confirmed and sent to channel!", show_alert=True)
         
     except Exception as e:
         await callback.answer(f"❌ Error: {str(e)}", show_alert=True)
-    finally:
-        session.close()
 
 
-@router.callback_query(F.data.startswith("admin_reject_"))
-async def reject_order(callback: CallbackQuery, bot: Bot):
+async def reject_order(callback: CallbackQuery, callback_data: AdminCallback, bot: Bot):
     """Admin rejects order"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("❌ You are not authorized!", show_alert=True)
-        return
-    
-    order_id = int(callback.data.split("_")[2])
+    order_id = callback_data.order_id
     
-    session = get_session()
     try:
-        order = OrderRepository.get_by_id(session, order_id)
+        # Only the first admin to act moves the order out of pending
+        changed = await run_write(
+            OrderRepository.transition, order_id, OrderStatus.PENDING, OrderStatus.CANCELLED,
+            changed_by=callback.from_user.id
+        )
+        order = get_order_view(order_id)
         
         if not order:
             await callback.answer("❌ Order not found!", show_alert=True)
             return
-        
-        if order.status != 'pending':
+        if not changed:
             await callback.answer(f"Order is already {order.status}!", show_alert=True)
             return
         
-        # Update order status
-        OrderRepository.update_status(session, order_id, 'cancelled')
-        
-        # Notify customer
-        try:
-            await bot.send_message(
-                order.user.telegram_id,
-                Messages.ORDER_REJECTED.format(order_id=order.id)
-            )
-        except Exception as e:
-            print(f"Error notifying customer: {e}")
-        
-        # Update admin message
-        await callback.message.edit_text(
-            f"❌ <b>ORDER REJECTED</b>\n\n{format_order_message(order)}",
-            parse_mode="HTML"
-        )
+        # Admin copies and the customer are updated in the background
+        event_bus.publish(bot, OrderRejected(order, (callback.message.chat.id, callback.message.message_id)))
         
         await callback.answer("❌ Order rejected!", show_alert=True)
         
     except Exception as e:
         await callback.answer(f"❌ Error: {str(e)}", show_alert=True)
-    finally:
-        session.close()
+
+
+@event_bus.subscribe(OrderConfirmed, OrderRejected)
+async def update_admin_copies(bot: Bot, event):
+    """Bring every admin's copy of the order up to date, the pressed one included"""
+    await sync_admin_messages(bot, event.order.id, also=[event.admin_copy] if event.admin_copy else ())
+
+
+@event_bus.subscribe(OrderConfirmed, OrderRejected)
+async def notify_customer(bot: Bot, event):
+    """Tell the customer their order was confirmed or rejected"""
+    text = Messages.ORDER_CONFIRMED if isinstance(event, OrderConfirmed) else Messages.ORDER_REJECTED
+    await bot.send_message(event.order.customer.telegram_id, text.format(order_id=event.order.id))
+
+
+@event_bus.subscribe(OrderConfirmed)
+async def post_to_channel(bot: Bot, event: OrderConfirmed):
+    """Forward a confirmed order to the channel, if configured"""
+    channel_id = live_config.channel_id
+    if not channel_id:
+        return
+    channel_msg = await bot.send_message(
+        channel_id,
+        f"✅ <b>CONFIRMED ORDER</b>\n\n{format_order_message(event.order)}",
+        parse_mode="HTML",
+        disable_web_page_preview=True
+    )
+    
+    # Update order with channel message ID
+    await run_write(OrderRepository.update_message_ids, event.order.id, channel_msg_id=channel_msg.message_id)
+
+
+# Admin order buttons are decoded once by the filter below and routed by action
+ORDER_ACTIONS = {
+    OrderAction.CONFIRM: confirm_order,
+    OrderAction.REJECT: reject_order,
+}
+
+
+@router.callback_query(AdminCallback.filter())
+async def handle_admin_callback(callback: CallbackQuery, callback_data: AdminCallback, bot: Bot):
+    """Dispatch an admin order button to its action handler"""
+    await ORDER_ACTIONS[callback_data.action](callback, callback_data, bot)
 
 
 @router.message(Command("admin"))
 async def admin_panel(message: Message):
     """Show admin panel"""
-    if not is_admin(message.from_user.id):
-        await message.answer("❌ You are not authorized!")
-        return
-    
     await message.answer(
         "👤 <b>Admin Panel</b>\n\n"
         "You can manage orders by responding to order notifications.\n\n"
         "Available commands:\n"
         "/stats - View statistics\n"
-        "/pending - View pending orders",
+        "/pending - View pending orders\n"
+        "/dispatch - Hand confirmed orders to couriers\n"
+        "/export [orders|items] [csv|parquet] [from] [to] [status,...] - Export orders\n"
+        "/report [from] [to] [status,...] - Sales report\n"
+        "/addadmin ID - Make a user admin\n"
+        "/removeadmin ID - Remove an admin added with /addadmin",
         parse_mode="HTML"
     )
 
@@ -148,25 +146,25 @@ async def admin_panel(message: Message):
 @router.message(Command("stats"))
 async def show_stats(message: Message):
     """Show order statistics"""
-    if not is_admin(message.from_user.id):
-        await message.answer("❌ You are not authorized!")
-        return
-    
     session = get_session()
     try:
         from database.models import Order, User
         
         total_orders = session.query(Order).count()
-        pending_orders = session.query(Order).filter(Order.status == 'pending').count()
-        confirmed_orders = session.query(Order).filter(Order.status == 'confirmed').count()
-        cancelled_orders = session.query(Order).filter(Order.status == 'cancelled').count()
+        pending_orders = session.query(Order).filter(Order.status == OrderStatus.PENDING).count()
+        confirmed_orders = session.query(Order).filter(Order.status == OrderStatus.CONFIRMED).count()
+        delivered_orders = session.query(Order).filter(Order.status == OrderStatus.DELIVERED).count()
+        cancelled_orders = session.query(Order).filter(Order.status == OrderStatus.CANCELLED).count()
         total_users = session.query(User).count()
         
+        # Same sales as /report
         total_revenue = session.query(func.sum(Order.total_amount)).filter(
-            Order.status == 'confirmed'
+            Order.status.in_(SALE_STATUSES)
         ).scalar() or 0
-        
-        stats_message = f"""
+    finally:
+        session.close()
+    
+    stats_message = f"""
 📊 <b>Store Statistics</b>
 
 👥 Total Users: {total_users}
@@ -175,49 +173,136 @@ async def show_stats(message: Message):
 📋 Order Status:
   • Pending: {pending_orders}
   • Confirmed: {confirmed_orders}
+  • Delivered: {delivered_orders}
   • Cancelled: {cancelled_orders}
 
 💰 Total Revenue: ${total_revenue:,.2f}
 """
-        
-        await message.answer(stats_message, parse_mode="HTML")
-        
-    finally:
-        session.close()
+    
+    await message.answer(stats_message, parse_mode="HTML")
 
 
 @router.message(Command("pending"))
 async def show_pending_orders(message: Message):
     """Show all pending orders"""
-    if not is_admin(message.from_user.id):
-        await message.answer("❌ You are not authorized!")
+    session = get_session()
+    try:
+        pending_orders = OrderRepository.get_by_status(session, OrderStatus.PENDING)
+    finally:
+        session.close()
+    
+    if not pending_orders:
+        await message.answer("✅ No pending orders!")
         return
     
-    session = get_session()
+    await message.answer(f"📋 <b>Pending Orders ({len(pending_orders)})</b>", parse_mode="HTML")
+    
+    copies = []
+    for order in pending_orders:
+        order_msg = format_order_message(order)
+        sent = await message.answer(
+            order_msg,
+            reply_markup=get_admin_keyboard(order.id),
+            parse_mode="HTML",
+            disable_web_page_preview=True
+        )
+        copies.append((order.id, sent.chat.id, sent.message_id))
+    
+    # These copies are kept in sync with the order too
+    await run_write(OrderRepository.add_admin_messages, copies)
+
+
+@router.message(Command("export"))
+async def export_data(message: Message, command: CommandObject):
+    """
+    Export orders as a file
+    /export [orders|items] [csv|parquet] [from YYYY-MM-DD] [to YYYY-MM-DD] [status,...]
+    """
     try:
-        from database.models import Order
-        
-        pending_orders = session.query(Order).filter(Order.status == 'pending').order_by(Order.created_at.desc()).all()
-        
-        if not pending_orders:
-            await message.answer("✅ No pending orders!")
-            return
-        
-        await message.answer(f"📋 <b>Pending Orders ({len(pending_orders)})</b>", parse_mode="HTML")
-        
-        for order in pending_orders:
-            order_msg = format_order_message(order)
-            await message.answer(
-                order_msg,
-                reply_markup=get_admin_keyboard(order.id),
-                parse_mode="HTML"
-            )
-            
-            if order.location_latitude and order.location_longitude:
-                await message.answer_location(
-                    latitude=order.location_latitude,
-                    longitude=order.location_longitude
-                )
-        
+        table, fmt, filters = parse_export_args((command.args or "").split())
+    except ValueError as e:
+        await message.answer(
+            f"❌ {e}\n\nUsage: /export [orders|items] [csv|parquet] [from] [to] [status,...]\n"
+            "Example: /export items csv 2024-01-01 2024-01-31 confirmed,delivered"
+        )
+        return
+    
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+    try:
+        # Streams from the database in chunks; keep it off the event loop
+        rows = await asyncio.to_thread(export_orders, path, table, fmt, filters)
+        await message.answer_document(
+            FSInputFile(path, filename=f"{table}.{fmt}"),
+            caption=f"📤 {rows} {table} rows, {filters.describe()}"
+        )
+    except RuntimeError as e:
+        await message.answer(f"❌ {e}")
     finally:
-        session.close()
\ No newline at end of file
+        os.remove(path)
+
+
+@router.message(Command("report"))
+async def show_report(message: Message, command: CommandObject):
+    """
+    Sales report: revenue by day, top variants and repeat customers
+    /report [from YYYY-MM-DD] [to YYYY-MM-DD] [status,...]
+    """
+    try:
+        _, _, filters = parse_export_args((command.args or "").split())
+    except ValueError as e:
+        await message.answer(f"❌ {e}\n\nUsage: /report [from] [to] [status,...]")
+        return
+    
+    report = await asyncio.to_thread(build_report, filters)
+    for part in split_message(report):
+        await message.answer(part, parse_mode="HTML")
+
+
+def _parse_user_id(command: CommandObject):
+    try:
+        return int((command.args or "").strip())
+    except ValueError:
+        return None
+
+
+@router.message(Command("addadmin"))
+async def add_admin(message: Message, command: CommandObject):
+    """Make a user admin: /addadmin <telegram id>"""
+    user_id = _parse_user_id(command)
+    if user_id is None:
+        await message.answer("Usage: /addadmin <telegram id>")
+        return
+    
+    if await run_write(AdminRepository.add, user_id, added_by=message.from_user.id):
+        # Applies here at once; other workers pick it up within CONFIG_RELOAD_INTERVAL
+        await live_config.refresh()
+        await message.answer(f"✅ {user_id} is now an admin.")
+    else:
+        await message.answer(f"{user_id} is already an admin.")
+
+
+@router.message(Command("removeadmin"))
+async def remove_admin(message: Message, command: CommandObject):
+    """Remove an admin added with /addadmin: /removeadmin <telegram id>"""
+    user_id = _parse_user_id(command)
+    if user_id is None:
+        await message.answer("Usage: /removeadmin <telegram id>")
+        return
+    
+    if await run_write(AdminRepository.remove, user_id):
+        await live_config.refresh()
+        note = " They are still listed in ADMIN_IDS." if live_config.is_admin(user_id) else ""
+        await message.answer(f"✅ {user_id} is no longer an admin.{note}")
+    else:
+        await message.answer(f"{user_id} was not added with /addadmin.")
+
+
+@denied_router.message(Command(*ADMIN_COMMANDS))
+async def deny_command(message: Message):
+    await message.answer("❌ You are not authorized!")
+
+
+@denied_router.callback_query(AdminCallback.filter())
+async def deny_button(callback: CallbackQuery):
+    await callback.answer("❌ You are not authorized!", show_alert=True)
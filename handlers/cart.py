@@ -1,7 +1,7 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 
-from database import get_session, UserRepository, CartRepository
+from database import get_session, run_write, UserRepository, CartRepository
 from utils import format_cart_message, get_cart_keyboard
 from config import Messages
 
@@ -14,30 +14,28 @@ async def view_cart(message: Message):
     session = get_session()
     try:
         user = UserRepository.get_by_telegram_id(session, message.from_user.id)
-        
-        if not user:
-            await message.answer("❌ Please register first by using /start")
-            return
-        
-        cart_items = CartRepository.get_user_cart(session, user.id)
-        
-        if not cart_items:
-            await message.answer(
-                Messages.CART_EMPTY,
-                reply_markup=get_cart_keyboard(has_items=False)
-            )
-            return
-        
-        cart_message = format_cart_message(cart_items)
-        
-        await message.answer(
-            cart_message,
-            reply_markup=get_cart_keyboard(has_items=True),
-            parse_mode="HTML"
-        )
-        
+        cart_items = CartRepository.get_cart_lines(session, user.id) if user else []
     finally:
         session.close()
+    
+    if not user:
+        await message.answer("❌ Please register first by using /start")
+        return
+    
+    if not cart_items:
+        await message.answer(
+            Messages.CART_EMPTY,
+            reply_markup=get_cart_keyboard(has_items=False)
+        )
+        return
+    
+    cart_message = format_cart_message(cart_items)
+    
+    await message.answer(
+        cart_message,
+        reply_markup=get_cart_keyboard(has_items=True),
+        parse_mode="HTML"
+    )
 
 
 @router.callback_query(F.data == "cart_clear")
@@ -46,15 +44,14 @@ async def clear_cart(callback: CallbackQuery):
     session = get_session()
     try:
         user = UserRepository.get_by_telegram_id(session, callback.from_user.id)
-        
-        if user:
-            CartRepository.clear_cart(session, user.id)
-            await callback.message.edit_text(
-                "🗑 Cart cleared!",
-                reply_markup=get_cart_keyboard(has_items=False)
-            )
-        
-        await callback.answer("Cart cleared!", show_alert=False)
-        
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+    
+    if user:
+        await run_write(CartRepository.clear_cart, user.id)
+        await callback.message.edit_text(
+            "🗑 Cart cleared!",
+            reply_markup=get_cart_keyboard(has_items=False)
+        )
+    
+    await callback.answer("Cart cleared!", show_alert=False)
@@ -1,174 +1,201 @@
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InputMediaPhoto
-from aiogram.fsm.context import FSMContext
 
-from database import get_session, CategoryRepository, ProductRepository, VariantRepository, CartRepository
+from database import (
+    get_session, run_write, UserRepository, CategoryRepository, ProductRepository, VariantRepository, CartRepository
+)
 from utils import (
     get_categories_keyboard,
     get_products_keyboard,
     get_variants_keyboard,
-    format_variant_caption
+    format_variant_caption,
+    CatalogCallback,
+    CatalogAction
 )
-from config import Messages
+from config import Messages, CATALOG_PAGE_SIZE, CATALOG_VERSION
 
 router = Router()
 
 
 @router.message(F.text == "🛍 Browse Categories")
 async def show_categories(message: Message):
-    """Show all available categories"""
+    """Show the first page of available categories"""
     session = get_session()
     try:
-        categories = CategoryRepository.get_all_active(session)
-        
-        if not categories:
-            await message.answer(Messages.NO_CATEGORIES)
-            return
-        
-        await message.answer(
-            Messages.SELECT_CATEGORY,
-            reply_markup=get_categories_keyboard(categories)
-        )
+        page = CategoryRepository.get_active_page(session, CATALOG_PAGE_SIZE)
+    finally:
+        session.close()
+    
+    if not page.items:
+        await message.answer(Messages.NO_CATEGORIES)
+        return
+    
+    await message.answer(
+        Messages.SELECT_CATEGORY,
+        reply_markup=get_categories_keyboard(page.items, page.has_prev, page.has_next)
+    )
+
+
+async def show_categories_page(callback: CallbackQuery, callback_data: CatalogCallback):
+    """Show a page of categories"""
+    session = get_session()
+    try:
+        page = CategoryRepository.get_active_page(session, CATALOG_PAGE_SIZE, **callback_data.page_cursor())
     finally:
         session.close()
+    
+    if not page.items:
+        await callback.answer(Messages.NO_CATEGORIES, show_alert=True)
+        return
+    
+    await callback.message.edit_text(
+        Messages.SELECT_CATEGORY,
+        reply_markup=get_categories_keyboard(page.items, page.has_prev, page.has_next)
+    )
+    await callback.answer()
 
 
-@router.callback_query(F.data.startswith("cat_"))
-async def show_category_products(callback: CallbackQuery):
-    """Show products in selected category"""
-    category_id = int(callback.data.split("_")[1])
+async def show_category_products(callback: CallbackQuery, callback_data: CatalogCallback):
+    """Show a page of products in selected category"""
+    category_id = callback_data.id
     
     session = get_session()
     try:
         category = CategoryRepository.get_by_id(session, category_id)
-        products = ProductRepository.get_by_category(session, category_id)
-        
-        if not products:
-            await callback.answer(Messages.NO_PRODUCTS, show_alert=True)
-            return
-        
-        await callback.message.edit_text(
-            f"📦 <b>{category.name}</b>\n\n{Messages.SELECT_PRODUCT}",
-            reply_markup=get_products_keyboard(products, category_id),
-            parse_mode="HTML"
+        page = ProductRepository.get_page_by_category(
+            session, category_id, CATALOG_PAGE_SIZE, **callback_data.page_cursor()
         )
-        await callback.answer()
     finally:
         session.close()
+    
+    if not category or not page.items:
+        await callback.answer(Messages.NO_PRODUCTS, show_alert=True)
+        return
+    
+    await callback.message.edit_text(
+        f"📦 <b>{category.name}</b>\n\n{Messages.SELECT_PRODUCT}",
+        reply_markup=get_products_keyboard(page.items, category_id, page.has_prev, page.has_next),
+        parse_mode="HTML"
+    )
+    await callback.answer()
 
 
-@router.callback_query(F.data.startswith("prod_"))
-async def show_product_variants(callback: CallbackQuery):
+async def show_product_variants(callback: CallbackQuery, callback_data: CatalogCallback):
     """Show product variants with images"""
-    product_id = int(callback.data.split("_")[1])
+    product_id = callback_data.id
     
     session = get_session()
     try:
         product = ProductRepository.get_by_id(session, product_id)
         variants = VariantRepository.get_by_product(session, product_id)
-        
-        if not variants:
-            await callback.answer(Messages.NO_VARIANTS, show_alert=True)
-            return
-        
-        # Delete previous message
-        await callback.message.delete()
-        
-        # Prepare media group with variant images
-        media_group = []
-        for idx, variant in enumerate(variants, 1):
-            caption = format_variant_caption(variant, idx) if idx == 1 else None
-            
-            if variant.image_file_id:
-                media_group.append(
-                    InputMediaPhoto(
-                        media=variant.image_file_id,
-                        caption=caption,
-                        parse_mode="HTML"
-                    )
-                )
-        
-        # Send media group if images exist
-        if media_group:
-            await callback.message.answer_media_group(media_group)
-        else:
-            # No images, just send text
-            text = f"<b>{product.name}</b>\n\n"
-            for idx, variant in enumerate(variants, 1):
-                text += format_variant_caption(variant, idx) + "\n\n"
-            await callback.message.answer(text, parse_mode="HTML")
-        
-        # Send variants keyboard
-        await callback.message.answer(
-            "Choose a variant to add to cart:",
-            reply_markup=get_variants_keyboard(variants, product_id)
-        )
-        
-        await callback.answer()
     finally:
         session.close()
+    
+    if not variants:
+        await callback.answer(Messages.NO_VARIANTS, show_alert=True)
+        return
+    
+    # Delete previous message
+    await callback.message.delete()
+    
+    # Prepare media group with variant images
+    media_group = []
+    for idx, variant in enumerate(variants, 1):
+        caption = format_variant_caption(variant, idx) if idx == 1 else None
+        
+        if variant.image_file_id:
+            media_group.append(
+                InputMediaPhoto(
+                    media=variant.image_file_id,
+                    caption=caption,
+                    parse_mode="HTML"
+                )
+            )
+    
+    # Send media group if images exist
+    if media_group:
+        await callback.message.answer_media_group(media_group)
+    else:
+        # No images, just send text
+        text = f"<b>{product.name}</b>\n\n"
+        for idx, variant in enumerate(variants, 1):
+            text += format_variant_caption(variant, idx) + "\n\n"
+        await callback.message.answer(text, parse_mode="HTML")
+    
+    # Send variants keyboard
+    await callback.message.answer(
+        "Choose a variant to add to cart:",
+        reply_markup=get_variants_keyboard(variants, product_id)
+    )
+    
+    await callback.answer()
 
 
-@router.callback_query(F.data.startswith("addvar_"))
-async def add_variant_to_cart(callback: CallbackQuery):
+async def add_variant_to_cart(callback: CallbackQuery, callback_data: CatalogCallback):
     """Add variant to cart"""
-    variant_id = int(callback.data.split("_")[1])
+    variant_id = callback_data.id
     user_id = callback.from_user.id
     
     session = get_session()
     try:
-        from database import UserRepository
-        
         # Check if user exists
         user = UserRepository.get_by_telegram_id(session, user_id)
-        if not user:
-            await callback.answer("❌ Please register first by using /start", show_alert=True)
-            return
-        
+    finally:
+        session.close()
+    
+    if not user:
+        await callback.answer("❌ Please register first by using /start", show_alert=True)
+        return
+    
+    try:
         # Add to cart
-        CartRepository.add_item(session, user.id, variant_id)
+        await run_write(CartRepository.add_item, user.id, variant_id)
         
         await callback.answer(Messages.ITEM_ADDED, show_alert=False)
         
     except Exception as e:
         await callback.answer(f"❌ Error: {str(e)}", show_alert=True)
-    finally:
-        session.close()
 
 
-@router.callback_query(F.data.startswith("backprod_"))
-async def back_to_products(callback: CallbackQuery):
-    """Go back to products list"""
-    product_id = int(callback.data.split("_")[1])
+async def back_to_products(callback: CallbackQuery, callback_data: CatalogCallback):
+    """Go back to the products page starting at this product"""
+    product_id = callback_data.id
     
     session = get_session()
     try:
         product = ProductRepository.get_by_id(session, product_id)
-        if product:
-            products = ProductRepository.get_by_category(session, product.category_id)
-            category = product.category
-            
-            await callback.message.edit_text(
-                f"📦 <b>{category.name}</b>\n\n{Messages.SELECT_PRODUCT}",
-                reply_markup=get_products_keyboard(products, product.category_id),
-                parse_mode="HTML"
+        category = CategoryRepository.get_by_id(session, product.category_id) if product else None
+        if category:
+            page = ProductRepository.get_page_by_category(
+                session, product.category_id, CATALOG_PAGE_SIZE, start_id=product_id
             )
-        await callback.answer()
     finally:
         session.close()
+    
+    # The product or its category was removed since the menu was sent
+    if not category:
+        await callback.answer(Messages.STALE_BUTTON, show_alert=True)
+        return
+    
+    await callback.message.edit_text(
+        f"📦 <b>{category.name}</b>\n\n{Messages.SELECT_PRODUCT}",
+        reply_markup=get_products_keyboard(page.items, product.category_id, page.has_prev, page.has_next),
+        parse_mode="HTML"
+    )
+    await callback.answer()
 
 
-@router.callback_query(F.data == "back_categories")
-async def back_to_categories(callback: CallbackQuery):
-    """Go back to categories list"""
-    session = get_session()
-    try:
-        categories = CategoryRepository.get_all_active(session)
-        
-        await callback.message.edit_text(
-            Messages.SELECT_CATEGORY,
-            reply_markup=get_categories_keyboard(categories)
-        )
-        await callback.answer()
-    finally:
-        session.close()
\ No newline at end of file
+# Catalog buttons are decoded once by the filter below and routed by action
+CATALOG_ACTIONS = {
+    CatalogAction.CATEGORIES: show_categories_page,
+    CatalogAction.CATEGORY: show_category_products,
+    CatalogAction.PRODUCT: show_product_variants,
+    CatalogAction.ADD_VARIANT: add_variant_to_cart,
+    CatalogAction.BACK_TO_PRODUCTS: back_to_products,
+}
+
+
+@router.callback_query(CatalogCallback.filter(F.v == CATALOG_VERSION))
+async def handle_catalog_callback(callback: CallbackQuery, callback_data: CatalogCallback):
+    """Dispatch a catalog button to its action handler"""
+    await CATALOG_ACTIONS[callback_data.action](callback, callback_data)
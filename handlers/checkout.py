@@ -3,15 +3,18 @@ from aiogram.types import Message, CallbackQuery, Location
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from database import get_session, UserRepository, CartRepository, OrderRepository
+from database import get_session, run_write, UserRepository, CartRepository, OrderRepository
 from utils import (
     get_note_keyboard,
     get_location_keyboard,
     get_main_menu_keyboard,
-    format_order_message,
-    get_admin_keyboard
+    get_order_view,
+    store_order_body
 )
-from config import Messages, ADMIN_IDS
+from utils.admin_messages import notify_admins, sync_admin_messages
+from utils.events import event_bus, OrderCreated
+from utils.geocoding import geocoder, resolve_order_address, schedule
+from config import Messages
 
 router = Router()
 
@@ -28,22 +31,21 @@ async def start_checkout(callback: CallbackQuery, state: FSMContext):
     session = get_session()
     try:
         user = UserRepository.get_by_telegram_id(session, callback.from_user.id)
-        cart_items = CartRepository.get_user_cart(session, user.id)
-        
-        if not cart_items:
-            await callback.answer("Your cart is empty!", show_alert=True)
-            return
-        
-        # Ask if user wants to add a note
-        await callback.message.edit_text(
-            Messages.ASK_NOTE,
-            reply_markup=get_note_keyboard()
-        )
-        
-        await callback.answer()
-        
+        cart_items = CartRepository.get_cart_lines(session, user.id)
     finally:
         session.close()
+    
+    if not cart_items:
+        await callback.answer("Your cart is empty!", show_alert=True)
+        return
+    
+    # Ask if user wants to add a note
+    await callback.message.edit_text(
+        Messages.ASK_NOTE,
+        reply_markup=get_note_keyboard()
+    )
+    
+    await callback.answer()
 
 
 @router.callback_query(F.data == "note_yes")
@@ -93,25 +95,26 @@ async def process_location(message: Message, state: FSMContext, bot: Bot):
     session = get_session()
     try:
         user = UserRepository.get_by_telegram_id(session, message.from_user.id)
-        cart_items = CartRepository.get_user_cart(session, user.id)
-        
-        if not cart_items:
-            await message.answer("Your cart is empty!", reply_markup=get_main_menu_keyboard())
-            await state.clear()
-            return
-        
-        # Create order
-        order = OrderRepository.create_order(
-            session=session,
+    finally:
+        session.close()
+    
+    try:
+        # Create order and clear cart in one write
+        created = await run_write(
+            OrderRepository.create_order_from_cart,
             user_id=user.id,
-            cart_items=cart_items,
             note=note,
             location_lat=location.latitude,
             location_lon=location.longitude
         )
         
-        # Clear cart
-        CartRepository.clear_cart(session, user.id)
+        if not created:
+            await message.answer("Your cart is empty!", reply_markup=get_main_menu_keyboard())
+            await state.clear()
+            return
+        
+        # Rendered once here; later messages only swap in the status
+        order = await store_order_body(get_order_view(created.id))
         
         # Send confirmation to user
         await message.answer(
@@ -119,31 +122,8 @@ async def process_location(message: Message, state: FSMContext, bot: Bot):
             reply_markup=get_main_menu_keyboard()
         )
         
-        # Send order to admin(s)
-        order_message = format_order_message(order)
-        
-        for admin_id in ADMIN_IDS:
-            try:
-                # Send order details
-                admin_msg = await bot.send_message(
-                    admin_id,
-                    order_message,
-                    reply_markup=get_admin_keyboard(order.id),
-                    parse_mode="HTML"
-                )
-                
-                # Send location
-                await bot.send_location(
-                    admin_id,
-                    latitude=location.latitude,
-                    longitude=location.longitude
-                )
-                
-                # Update order with admin message ID
-                OrderRepository.update_message_ids(session, order.id, admin_msg_id=admin_msg.message_id)
-                
-            except Exception as e:
-                print(f"Error sending to admin {admin_id}: {e}")
+        # Admins are notified in the background
+        event_bus.publish(bot, OrderCreated(order))
         
         # Clear state
         await state.clear()
@@ -151,8 +131,25 @@ async def process_location(message: Message, state: FSMContext, bot: Bot):
     except Exception as e:
         await message.answer(f"❌ Error creating order: {str(e)}", reply_markup=get_main_menu_keyboard())
         await state.clear()
-    finally:
-        session.close()
+
+
+@event_bus.subscribe(OrderCreated)
+async def announce_order(bot: Bot, event: OrderCreated):
+    """Send the order details to all admins at once (the location is a maps link in the message)"""
+    order = event.order
+    await notify_admins(bot, order)
+    
+    # Resolve the address in the background and add it to the admin messages; only once
+    # the copies are recorded, so the sync reaches all of them
+    if geocoder.enabled:
+        schedule(attach_address(bot, order.id, order.location_latitude, order.location_longitude))
+
+
+async def attach_address(bot: Bot, order_id: int, latitude: float, longitude: float):
+    """Store the order's resolved address and show it in the admin notifications"""
+    address = await resolve_order_address(order_id, latitude, longitude)
+    if address:
+        await sync_admin_messages(bot, order_id)
 
 
 @router.message(CheckoutStates.waiting_location)
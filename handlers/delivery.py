@@ -0,0 +1,147 @@
+import logging
+from aiogram import Router, Bot
+from aiogram.types import CallbackQuery, Message
+from aiogram.filters import Command
+
+from database import get_session, run_write, OrderRepository, DeliveryRepository
+from utils import is_admin, is_courier, format_route_message, get_order_view, get_route_keyboard, DeliveryCallback
+from utils.admin_messages import sync_admin_messages
+from utils.events import event_bus, OrderDelivered
+from utils.live_config import live_config
+from utils.routing import plan_routes
+from config import Messages, DISPATCH_CELL_KM, DISPATCH_MAX_STOPS, STORE_LATITUDE, STORE_LONGITUDE
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+STORE_LOCATION = (STORE_LATITUDE, STORE_LONGITUDE) if STORE_LATITUDE and STORE_LONGITUDE else None
+
+
+def _open_route(courier_id: int):
+    session = get_session()
+    try:
+        return DeliveryRepository.get_open_route(session, courier_id)
+    finally:
+        session.close()
+
+
+async def send_route(bot: Bot, courier_id: int):
+    """Send the courier their whole open route as a single message"""
+    deliveries = _open_route(courier_id)
+    if not deliveries:
+        return
+    await bot.send_message(
+        courier_id,
+        format_route_message(deliveries, STORE_LOCATION),
+        reply_markup=get_route_keyboard(deliveries),
+        parse_mode="HTML",
+        disable_web_page_preview=True
+    )
+
+
+@router.message(Command("dispatch"))
+async def dispatch_orders(message: Message, bot: Bot):
+    """Group confirmed orders by area and hand one route to each courier"""
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ You are not authorized!")
+        return
+
+    courier_ids = live_config.courier_ids
+    if not courier_ids:
+        await message.answer("❌ No couriers configured (COURIER_IDS).")
+        return
+
+    session = get_session()
+    try:
+        orders = OrderRepository.get_awaiting_dispatch(session)
+        if orders:
+            open_stops = DeliveryRepository.get_open_stops(session, courier_ids)
+    finally:
+        session.close()
+
+    if not orders:
+        await message.answer("✅ No orders waiting for delivery!")
+        return
+
+    capacities = {courier_id: DISPATCH_MAX_STOPS - open_stops.get(courier_id, 0) for courier_id in courier_ids}
+    stops = [(order.id, order.location_latitude, order.location_longitude) for order in orders]
+
+    routes = plan_routes(stops, capacities, DISPATCH_CELL_KM, STORE_LOCATION)
+    assigned = await run_write(DeliveryRepository.assign, routes) if routes else {}
+
+    for courier_id in assigned:
+        try:
+            await send_route(bot, courier_id)
+        except Exception as e:
+            logger.warning(f"Error sending route to courier {courier_id}: {e}")
+
+    dispatched = sum(assigned.values())
+    await message.answer(
+        f"🚚 <b>Dispatch</b>\n\n"
+        f"Assigned: {dispatched} orders to {len(assigned)} couriers\n"
+        f"Waiting: {len(stops) - dispatched} orders",
+        parse_mode="HTML"
+    )
+
+
+@router.message(Command("route"))
+async def show_route(message: Message, bot: Bot):
+    """Courier asks for their open route again"""
+    if not is_courier(message.from_user.id):
+        await message.answer("❌ You are not authorized!")
+        return
+
+    session = get_session()
+    try:
+        has_stops = bool(DeliveryRepository.get_open_stops(session, [message.from_user.id]))
+    finally:
+        session.close()
+
+    if not has_stops:
+        await message.answer("✅ No deliveries assigned to you!")
+        return
+    await send_route(bot, message.from_user.id)
+
+
+@router.callback_query(DeliveryCallback.filter())
+async def mark_delivered(callback: CallbackQuery, callback_data: DeliveryCallback, bot: Bot):
+    """Courier marks a stop as delivered"""
+    if not is_courier(callback.from_user.id):
+        await callback.answer("❌ You are not authorized!", show_alert=True)
+        return
+
+    order_id = callback_data.order_id
+    delivered = await run_write(DeliveryRepository.mark_delivered, order_id, callback.from_user.id)
+    if not delivered:
+        await callback.answer(f"Order #{order_id} is not open on your route.", show_alert=True)
+        return
+
+    # The customer and the admin copies are updated in the background
+    event_bus.publish(bot, OrderDelivered(get_order_view(order_id)))
+
+    # Refresh the route message with the remaining stops
+    deliveries = _open_route(callback.from_user.id)
+    if deliveries:
+        await callback.message.edit_text(
+            format_route_message(deliveries, STORE_LOCATION),
+            reply_markup=get_route_keyboard(deliveries),
+            parse_mode="HTML",
+            disable_web_page_preview=True
+        )
+    else:
+        await callback.message.edit_text("✅ <b>Route completed!</b>", parse_mode="HTML")
+
+    await callback.answer(f"📦 Order #{order_id} delivered!")
+
+
+@event_bus.subscribe(OrderDelivered)
+async def notify_customer_delivered(bot: Bot, event: OrderDelivered):
+    """Tell the customer their order was delivered"""
+    await bot.send_message(event.order.customer.telegram_id, Messages.ORDER_DELIVERED.format(order_id=event.order.id))
+
+
+@event_bus.subscribe(OrderDelivered)
+async def update_delivered_admin_copies(bot: Bot, event: OrderDelivered):
+    """Show the delivered status on every admin's copy of the order"""
+    await sync_admin_messages(bot, event.order.id)
@@ -0,0 +1,12 @@
+from aiogram import Router
+from aiogram.types import CallbackQuery
+
+from config import Messages
+
+router = Router()
+
+
+@router.callback_query()
+async def stale_callback(callback: CallbackQuery):
+    """Answer buttons no other router matched, e.g. sent before a catalog version bump"""
+    await callback.answer(Messages.STALE_BUTTON, show_alert=True)
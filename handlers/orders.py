@@ -13,41 +13,41 @@ async def show_my_orders(message: Message):
     session = get_session()
     try:
         user = UserRepository.get_by_telegram_id(session, message.from_user.id)
-        
-        if not user:
-            await message.answer("❌ Please register first by using /start")
-            return
-        
-        orders = OrderRepository.get_user_orders(session, user.id)
-        
-        if not orders:
-            await message.answer(
-                "📦 You haven't placed any orders yet.",
-                reply_markup=get_main_menu_keyboard()
-            )
-            return
-        
+        if user:
+            orders = OrderRepository.get_user_orders(session, user.id, limit=10)  # Show last 10 orders
+            total = OrderRepository.count_user_orders(session, user.id) if orders else 0
+    finally:
+        session.close()
+    
+    if not user:
+        await message.answer("❌ Please register first by using /start")
+        return
+    
+    if not orders:
         await message.answer(
-            f"📦 <b>Your Orders ({len(orders)})</b>\n\n"
-            "Here's your order history:",
-            parse_mode="HTML"
+            "📦 You haven't placed any orders yet.",
+            reply_markup=get_main_menu_keyboard()
         )
+        return
+    
+    await message.answer(
+        f"📦 <b>Your Orders ({total})</b>\n\n"
+        "Here's your order history:",
+        parse_mode="HTML"
+    )
+    
+    for order in orders:
+        status_emoji = {
+            'pending': '⏳',
+            'confirmed': '✅',
+            'cancelled': '❌',
+            'delivered': '📦'
+        }
         
-        for order in orders[:10]:  # Show last 10 orders
-            status_emoji = {
-                'pending': '⏳',
-                'confirmed': '✅',
-                'cancelled': '❌',
-                'delivered': '📦'
-            }
-            
-            emoji = status_emoji.get(order.status, '❓')
-            
-            order_msg = f"{emoji} {format_order_message(order)}"
-            await message.answer(order_msg, parse_mode="HTML")
-        
-        if len(orders) > 10:
-            await message.answer(f"... and {len(orders) - 10} more orders")
+        emoji = status_emoji.get(order.status, '❓')
         
-    finally:
-        session.close()
\ No newline at end of file
+        order_msg = f"{emoji} {format_order_message(order)}"
+        await message.answer(order_msg, parse_mode="HTML")
+    
+    if total > len(orders):
+        await message.answer(f"... and {total - len(orders)} more orders")
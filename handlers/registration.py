@@ -4,7 +4,7 @@ from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from database import get_session, UserRepository
+from database import get_session, run_write, UserRepository
 from utils import validate_phone_number, get_main_menu_keyboard
 from config import Messages
 
@@ -23,19 +23,19 @@ async def cmd_start(message: Message, state: FSMContext):
     try:
         # Check if user already exists
         user = UserRepository.get_by_telegram_id(session, message.from_user.id)
-        
-        if user:
-            # User already registered
-            await message.answer(
-                f"Welcome back, {message.from_user.first_name}! 👋",
-                reply_markup=get_main_menu_keyboard()
-            )
-        else:
-            # New user - request phone number
-            await message.answer(Messages.WELCOME)
-            await state.set_state(RegistrationStates.waiting_phone)
     finally:
         session.close()
+    
+    if user:
+        # User already registered
+        await message.answer(
+            f"Welcome back, {message.from_user.first_name}! 👋",
+            reply_markup=get_main_menu_keyboard()
+        )
+    else:
+        # New user - request phone number
+        await message.answer(Messages.WELCOME)
+        await state.set_state(RegistrationStates.waiting_phone)
 
 
 @router.message(RegistrationStates.waiting_phone)
@@ -50,10 +50,9 @@ async def process_phone_number(message: Message, state: FSMContext):
         return
     
     # Save user to database
-    session = get_session()
     try:
-        user = UserRepository.create(
-            session=session,
+        await run_write(
+            UserRepository.create,
             telegram_id=message.from_user.id,
             phone_number=phone,
             username=message.from_user.username,
@@ -70,6 +69,4 @@ async def process_phone_number(message: Message, state: FSMContext):
         await state.clear()
         
     except Exception as e:
-        await message.answer(f"❌ Error registering user: {str(e)}")
-    finally:
-        session.close()
\ No newline at end of file
+        await message.answer(f"❌ Error registering user: {str(e)}")
\ No newline at end of file
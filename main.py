@@ -1,41 +1,68 @@
+import argparse
 import asyncio
 import logging
 import sys
+from contextlib import asynccontextmanager
+from typing import Dict
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
 
-from config import BOT_TOKEN
-from database import init_db
+from config import (
+    BOT_TOKEN, METRICS_LOG_INTERVAL, METRICS_HOST, METRICS_PORT, WORKERS, MAINTENANCE_INTERVAL, CART_REMINDER_INTERVAL,
+    SHUTDOWN_TIMEOUT, IDEMPOTENCY_FLUSH_INTERVAL, CONFIG_RELOAD_INTERVAL
+)
+from database import init_db, engine, read_engine, write_coordinator
+from database.tenancy import DEFAULT_TENANT, for_tenant
 from middlewares.database import DatabaseMiddleware
+from middlewares.inflight import InFlightMiddleware
+from middlewares.log_context import LogContextMiddleware
+from middlewares.tenant import TenantMiddleware
+from middlewares.idempotency import IdempotencyMiddleware, update_ledger
+from middlewares.throttling import ThrottlingMiddleware
+from middlewares.metrics import MetricsMiddleware, BotApiMetricsMiddleware
+from utils import geocoding
+from utils.events import event_bus
+from utils.live_config import live_config
+from utils.log import setup_logging
+from utils.metrics import metrics, instrument_engine, log_summary, start_metrics_server
+from utils.scheduler import Scheduler
+from utils.startup import StartupTimer, warm_caches
 
-# Import handlers
-from handlers import registration, catalog, cart, checkout, admin, orders
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    stream=sys.stdout
-)
+# Configure logging: records are written by a background thread
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
-async def main():
-    """Main bot function"""
-    
-    # Initialize database
-    logger.info("Initializing database...")
-    init_db()
-    
-    # Initialize bot and dispatcher
-    bot = Bot(
-        token=BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-    )
+def load_handlers():
+    """Import the handler modules; deferred so they can load while the database is checked"""
+    from handlers import registration, catalog, cart, checkout, admin, delivery, orders, fallback
+    return registration, catalog, cart, checkout, admin, delivery, orders, fallback
+
+
+def create_dispatcher(throttle: bool = True, tenants: Dict[int, str] = None) -> Dispatcher:
+    """
+    Create dispatcher with middleware and routers registered
+    `tenants` maps bot ids to tenant ids when one dispatcher serves several bots
+    """
+    registration, catalog, cart, checkout, admin, delivery, orders, fallback = load_handlers()
     dp = Dispatcher()
     
     # Register middleware
+    dp['in_flight'] = InFlightMiddleware()
+    dp.update.outer_middleware(dp['in_flight'])
+    if tenants:
+        # Before anything that reads or writes the database
+        dp.update.outer_middleware(TenantMiddleware(tenants))
+    dp.update.outer_middleware(LogContextMiddleware())
+    dp.update.outer_middleware(IdempotencyMiddleware())
+    if throttle:
+        throttling = ThrottlingMiddleware()
+        metrics.register_collector('throttled', throttling.stats)
+        dp.message.outer_middleware(throttling)
+        dp.callback_query.outer_middleware(throttling)
+    dp.message.middleware(MetricsMiddleware())
+    dp.callback_query.middleware(MetricsMiddleware())
     dp.message.middleware(DatabaseMiddleware())
     dp.callback_query.middleware(DatabaseMiddleware())
     
@@ -46,20 +73,138 @@ async def main():
     dp.include_router(checkout.router)
     dp.include_router(orders.router)
     dp.include_router(admin.router)
+    dp.include_router(admin.denied_router)
+    dp.include_router(delivery.router)
+    dp.include_router(fallback.router)  # Must stay last: catches unmatched buttons
     
-    # Start polling
+    return dp
+
+
+def create_bot(token: str = BOT_TOKEN) -> Bot:
+    """Create bot with Bot API metrics enabled"""
+    bot = Bot(
+        token=token,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+    bot.session.middleware(BotApiMetricsMiddleware())
+    return bot
+
+
+@asynccontextmanager
+async def running_services(bot: Bot, metrics_port: int = METRICS_PORT, jobs: bool = True,
+                           tenants: Dict[str, Bot] = None):
+    """
+    Run the per-process background services: DB instrumentation, metrics, the writer
+    and the scheduler; `jobs` enables the shared jobs, which must run in one process only.
+    `tenants` maps tenant ids to their bots in multi-tenant mode
+    """
+    instrument_engine(engine)
+    if read_engine is not engine:
+        instrument_engine(read_engine)
+    
+    # Start metrics reporting
+    metrics_runner = await start_metrics_server(METRICS_HOST, metrics_port) if metrics_port else None
+    
+    # Start the database writer
+    await write_coordinator.start()
+    
+    # Start scheduled jobs
+    scheduler = Scheduler().every(METRICS_LOG_INTERVAL, log_summary)
+    scheduler.every(IDEMPOTENCY_FLUSH_INTERVAL, update_ledger.flush, name='update_ledger')
+    scheduler.every(CONFIG_RELOAD_INTERVAL, live_config.refresh, name='live_config')
+    if jobs:
+        from database.maintenance import run_maintenance
+        from utils.reminders import send_cart_reminders
+        # Maintenance covers all tenants; reminders go out per tenant, through its own bot
+        scheduler.every(MAINTENANCE_INTERVAL, for_tenant(None, run_maintenance))
+        for tenant, tenant_bot in (tenants or {DEFAULT_TENANT: bot}).items():
+            scheduler.every(CART_REMINDER_INTERVAL, for_tenant(tenant, send_cart_reminders), tenant_bot,
+                            name=f"send_cart_reminders:{tenant}" if tenants else None)
+    scheduler.start()
+    try:
+        yield
+    finally:
+        await scheduler.stop()
+        await update_ledger.flush()
+        # Event subscribers and pending address lookups still write through the coordinator
+        await event_bus.drain(SHUTDOWN_TIMEOUT)
+        await geocoding.drain(SHUTDOWN_TIMEOUT)
+        await geocoding.geocoder.close()
+        # Commits whatever is still queued
+        await write_coordinator.stop()
+        if metrics_runner:
+            await metrics_runner.cleanup()
+        engine.dispose()
+        if read_engine is not engine:
+            read_engine.dispose()
+
+
+async def drain_updates(dp: Dispatcher, timeout: float = SHUTDOWN_TIMEOUT):
+    """Let handlers that are already running finish, up to the timeout"""
+    in_flight = dp['in_flight']
+    if in_flight.active:
+        logger.info(f"Waiting for {in_flight.active} running handlers...")
+    if not await in_flight.wait_idle(timeout):
+        logger.warning(f"Shutdown timeout: {in_flight.active} handlers still running")
+
+
+async def startup(tenants: Dict[int, str] = None) -> Dispatcher:
+    """
+    Get ready to take updates: check the schema while the handlers load, then load
+    the update ledger and admin roster and warm the caches; logs how long each step took.
+    `tenants` maps bot ids to tenant ids in multi-tenant mode
+    """
+    timer = StartupTimer()
+    await asyncio.gather(
+        timer.run('schema', asyncio.to_thread(init_db)),
+        timer.run('handlers', asyncio.to_thread(load_handlers)),
+    )
+    dp = create_dispatcher(tenants=tenants)
+    await asyncio.gather(
+        timer.run('ledger', asyncio.to_thread(update_ledger.load)),
+        timer.run('warmup', warm_caches(tenants=sorted(set(tenants.values())) if tenants else (DEFAULT_TENANT,))),
+        timer.run('config', live_config.refresh()),
+    )
+    logger.info(timer.summary())
+    return dp
+
+
+async def main():
+    """Main bot function"""
+    
+    # Initialize database, bot and dispatcher
     logger.info("Starting bot...")
+    bot = create_bot()
+    dp = await startup()
+    
+    # Start polling; SIGTERM/SIGINT stop it, then running handlers, queued writes
+    # and background lookups finish before the bot session and engines close
     try:
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        async with running_services(bot):
+            await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types(), close_bot_session=False)
+            await drain_updates(dp)
     finally:
         await bot.session.close()
+    logger.info("Bot stopped")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Telegram store bot")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="Worker processes; >1 shards updates by user")
+    parser.add_argument('--tenants', help="JSON file of stores to host in this process, served by webhook")
+    args = parser.parse_args()
+    
     try:
-        asyncio.run(main())
+        if args.tenants:
+            from multitenant import run_multitenant
+            asyncio.run(run_multitenant(args.tenants))
+        elif args.workers > 1:
+            from supervisor import run_supervisor
+            run_supervisor(args.workers)
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
         logger.error(f"Error: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,105 @@
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, Awaitable, List
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from config import IDEMPOTENCY_TTL_HOURS, IDEMPOTENCY_CACHE_SIZE
+from database import get_session, run_write, UpdateLedgerRepository
+from database.tenancy import DEFAULT_TENANT, current_tenant
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def update_keys(update: Update) -> List[str]:
+    """
+    Ledger keys of an update: its id, plus the callback query id for button presses
+    Update ids are per bot, so other tenants' keys are prefixed with the tenant id
+    """
+    tenant = current_tenant.get()
+    prefix = "" if tenant == DEFAULT_TENANT else f"{tenant}:"
+    keys = [f"{prefix}u{update.update_id}"]
+    if update.callback_query is not None:
+        keys.append(f"{prefix}c{update.callback_query.id}")
+    return keys
+
+
+class UpdateLedger:
+    """
+    Keys of recently processed updates
+    Lookups only touch an in-memory LRU; new keys are written to the processed_updates
+    table in batches (flush) and loaded back on startup, so re-deliveries after a
+    restart are caught too
+    """
+
+    def __init__(self, size: int = IDEMPOTENCY_CACHE_SIZE):
+        self.size = size
+        self._seen = OrderedDict()
+        self._pending = []
+
+    def claim(self, keys) -> bool:
+        """Remember the keys; False if any of them was seen before"""
+        if any(key in self._seen for key in keys):
+            for key in keys:
+                if key in self._seen:
+                    self._seen.move_to_end(key)
+            return False
+        for key in keys:
+            self._remember(key)
+        self._pending.extend(keys)
+        return True
+
+    def _remember(self, key: str):
+        self._seen[key] = None
+        if len(self._seen) > self.size:
+            self._seen.popitem(last=False)
+
+    def load(self, ttl_hours: float = IDEMPOTENCY_TTL_HOURS) -> int:
+        """Fill the cache from the ledger; returns the number of keys loaded"""
+        session = get_session()
+        try:
+            keys = UpdateLedgerRepository.get_keys_since(
+                session, datetime.utcnow() - timedelta(hours=ttl_hours), limit=self.size
+            )
+        finally:
+            session.close()
+        for key in keys:
+            self._remember(key)
+        return len(keys)
+
+    async def flush(self):
+        """Persist keys claimed since the last flush"""
+        if not self._pending:
+            return
+        keys, self._pending = self._pending, []
+        try:
+            await run_write(UpdateLedgerRepository.record, keys, datetime.utcnow())
+        except Exception:
+            # Retried with the next flush; the in-memory cache still covers them
+            logger.exception("Writing the update ledger failed")
+            self._pending[:0] = keys
+
+
+# Shared by every dispatcher of the process
+update_ledger = UpdateLedger()
+
+
+class IdempotencyMiddleware(BaseMiddleware):
+    """Skip updates and callback queries that were already processed, before any filter or handler runs"""
+
+    def __init__(self, ledger: UpdateLedger = update_ledger):
+        self.ledger = ledger
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if not self.ledger.claim(update_keys(event)):
+            metrics.inc('duplicate_updates_total')
+            logger.info(f"Skipped duplicate update {event.update_id}")
+            return None
+        return await handler(event, data)
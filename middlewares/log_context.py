@@ -0,0 +1,22 @@
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from utils.log import bind, log_context
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """Tag every record logged while handling an update with its id and user"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get('event_from_user')
+        token = bind(update_id=event.update_id, user_id=user.id if user else None)
+        try:
+            return await handler(event, data)
+        finally:
+            log_context.reset(token)
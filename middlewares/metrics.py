@@ -0,0 +1,66 @@
+import logging
+import time
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.types import TelegramObject
+
+from utils.log import SAMPLED, bind, log_context
+from utils.metrics import RequestStats, current_request, record_handler, record_api_call
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Middleware to record per-handler latency, DB and Bot API work"""
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Execute handler while collecting stats for the current update
+        """
+        stats = RequestStats()
+        handler_name = _handler_name(data)
+        token = current_request.set(stats)
+        log_token = bind(handler=handler_name)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+            record_handler(handler_name, elapsed, stats)
+            # Sampled: one per update would flood the log; handler_seconds has them all
+            logger.info("Handled update", extra={**SAMPLED, 'latency_ms': round(elapsed * 1000, 2)})
+            log_context.reset(log_token)
+
+
+def _handler_name(data: Dict[str, Any]) -> str:
+    """Handler function name, suffixed with the button action for dict-dispatched callbacks"""
+    handler = data.get('handler')
+    name = handler.callback.__name__ if handler is not None else 'unknown'
+    action = getattr(data.get('callback_data'), 'action', None)
+    if action is not None:
+        name = f"{name}:{action.name.lower()}"
+    return name
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Bot session middleware to record Bot API call count and latency"""
+    
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod
+    ):
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            record_api_call(type(method).__name__, time.perf_counter() - start)
@@ -0,0 +1,28 @@
+from typing import Callable, Dict, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from database.tenancy import current_tenant
+from utils.log import bind, log_context
+
+
+class TenantMiddleware(BaseMiddleware):
+    """Scope everything an update does to the tenant of the bot that received it"""
+
+    def __init__(self, tenants: Dict[int, str]):
+        self.tenants = tenants  # Tenant id by bot id
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        tenant = self.tenants[data['bot'].id]
+        token = current_tenant.set(tenant)
+        log_token = bind(tenant=tenant)
+        try:
+            return await handler(event, data)
+        finally:
+            log_context.reset(log_token)
+            current_tenant.reset(token)
@@ -0,0 +1,101 @@
+import time
+from collections import Counter
+from typing import Callable, Dict, Any, Awaitable, Optional
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, CallbackQuery
+
+from config import Messages, THROTTLE_RATE, THROTTLE_BURST, THROTTLE_DUPLICATE_WINDOW
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Per-user anti-flood middleware
+    Each user gets an in-memory token bucket shared by messages and callbacks,
+    and identical callbacks repeated within a short window are dropped
+    """
+
+    # Idle users are pruned once the tables grow past this size
+    MAX_TRACKED_USERS = 10000
+
+    def __init__(
+        self,
+        rate: float = THROTTLE_RATE,
+        burst: int = THROTTLE_BURST,
+        duplicate_window: float = THROTTLE_DUPLICATE_WINDOW
+    ):
+        self.rate = rate  # Tokens refilled per second
+        self.burst = burst  # Bucket capacity
+        self.duplicate_window = duplicate_window  # Seconds
+        self._buckets: Dict[int, list] = {}  # user_id -> [tokens, last_refill]
+        self._last_callbacks: Dict[int, tuple] = {}  # user_id -> (callback data, timestamp)
+        self.counters = Counter()  # Throttled events by reason
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        """
+        Drop the event before any filter or handler runs if the user is flooding
+        """
+        user = data.get('event_from_user')
+        if user is None:
+            return await handler(event, data)
+
+        now = time.monotonic()
+
+        if isinstance(event, CallbackQuery) and self._is_duplicate(user.id, event.data, now):
+            self.counters['duplicate'] += 1
+            await event.answer()
+            return None
+
+        if not self._take_token(user.id, now):
+            self.counters['rate_limited'] += 1
+            if isinstance(event, CallbackQuery):
+                await event.answer(Messages.THROTTLED)
+            return None
+
+        return await handler(event, data)
+
+    def _is_duplicate(self, user_id: int, callback_data: Optional[str], now: float) -> bool:
+        """Check whether the same button was pressed within the duplicate window"""
+        previous = self._last_callbacks.get(user_id)
+        self._last_callbacks[user_id] = (callback_data, now)
+        return previous is not None and previous[0] == callback_data and now - previous[1] < self.duplicate_window
+
+    def _take_token(self, user_id: int, now: float) -> bool:
+        """Refill the user's bucket and try to spend one token"""
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_TRACKED_USERS:
+                self._prune(now)
+            bucket = self._buckets[user_id] = [float(self.burst), now]
+
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1
+        return True
+
+    def _prune(self, now: float):
+        """Forget users whose bucket has refilled completely"""
+        refill_time = self.burst / self.rate
+        self._buckets = {
+            user_id: bucket for user_id, bucket in self._buckets.items()
+            if now - bucket[1] < refill_time
+        }
+        self._last_callbacks = {
+            user_id: last for user_id, last in self._last_callbacks.items()
+            if now - last[1] < self.duplicate_window
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Throttled event counters and number of tracked users"""
+        return {
+            'rate_limited': self.counters['rate_limited'],
+            'duplicate': self.counters['duplicate'],
+            'tracked_users': len(self._buckets)
+        }
@@ -0,0 +1,109 @@
+"""
+Multi-tenant mode: one process hosts the bots of several stores
+Every store's bot posts its updates to one webhook server at WEBHOOK_PATH/<tenant id>. One
+dispatcher, connection pool and writer serve them all; each update is scoped to the tenant
+of the bot that received it (database/tenancy.py), so stores never see each other's rows.
+Usage: python main.py --tenants tenants.json
+"""
+import asyncio
+import json
+import logging
+import re
+import signal
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+
+from config import WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET
+from database.tenancy import scope_queries
+from utils.live_config import live_config
+
+logger = logging.getLogger(__name__)
+
+TENANT_ID = re.compile(r'^[A-Za-z0-9_-]{1,50}$')
+
+
+@dataclass(frozen=True)
+class Tenant:
+    id: str
+    token: str
+    admin_ids: Tuple[int, ...] = ()
+    channel_id: str = ''
+    courier_ids: Tuple[int, ...] = ()
+
+
+def load_tenants(path: str) -> List[Tenant]:
+    """
+    Read the tenants file: a JSON list of
+    {"id": "books", "token": "123:ABC", "admin_ids": [1, 2], "channel_id": "@books_orders", "courier_ids": [3]}
+    """
+    with open(path, encoding='utf-8') as file:
+        entries = json.load(file)
+    tenants = [
+        Tenant(
+            entry['id'], entry['token'], tuple(entry.get('admin_ids', ())), entry.get('channel_id', ''),
+            tuple(entry.get('courier_ids', ()))
+        )
+        for entry in entries
+    ]
+    for tenant in tenants:
+        if not TENANT_ID.match(tenant.id):
+            raise ValueError(f"Invalid tenant id {tenant.id!r}: use up to 50 letters, digits, '-' or '_'")
+    if len({tenant.id for tenant in tenants}) != len(tenants):
+        raise ValueError("Tenant ids must be unique")
+    return tenants
+
+
+def webhook_path(tenant_id: str) -> str:
+    return f"{WEBHOOK_PATH.rstrip('/')}/{tenant_id}"
+
+
+async def run_multitenant(path: str):
+    """Serve every tenant's bot through the webhook server until SIGTERM or SIGINT"""
+    from main import create_bot, startup, running_services, drain_updates
+
+    tenants = load_tenants(path)
+    if not WEBHOOK_BASE_URL:
+        raise RuntimeError("Multi-tenant mode needs WEBHOOK_BASE_URL, the public URL of the webhook server")
+    scope_queries()
+    bots = {tenant.id: create_bot(tenant.token) for tenant in tenants}
+    for tenant in tenants:
+        live_config.add_tenant(tenant.id, tenant.admin_ids, tenant.channel_id, tenant.courier_ids)
+    dp = await startup(tenants={bot.id: tenant_id for tenant_id, bot in bots.items()})
+
+    app = web.Application()
+    for tenant_id, bot in bots.items():
+        SimpleRequestHandler(dp, bot, secret_token=WEBHOOK_SECRET or None).register(app, path=webhook_path(tenant_id))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+
+    try:
+        async with running_services(None, tenants=bots):
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT)
+            try:
+                await site.start()
+                allowed_updates = dp.resolve_used_update_types()
+                await asyncio.gather(*(
+                    bot.set_webhook(
+                        f"{WEBHOOK_BASE_URL.rstrip('/')}{webhook_path(tenant_id)}",
+                        secret_token=WEBHOOK_SECRET or None, allowed_updates=allowed_updates
+                    )
+                    for tenant_id, bot in bots.items()
+                ))
+                logger.info(f"Serving {len(bots)} tenants on {WEBHOOK_HOST}:{WEBHOOK_PORT}")
+                await stop.wait()
+            finally:
+                # Stop taking updates (Telegram keeps them until the next start), then finish the running ones
+                await site.stop()
+                await drain_updates(dp)
+                await runner.cleanup()
+    finally:
+        await asyncio.gather(*(bot.session.close() for bot in bots.values()))
+    logger.info("Bots stopped")
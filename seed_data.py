@@ -1,10 +1,45 @@
 """
 Script to populate database with sample data for testing
+Usage: python seed_data.py [--scale N]
 """
+import argparse
+
 from database import init_db, get_session
 from database.models import Category, Product, ProductVariant
 
-def seed_database():
+
+def seed_bulk_products(session, categories, scale: int):
+    """Add `scale` generated products with 3 variants each to every category"""
+    for category in categories:
+        products = [
+            Product(
+                category_id=category.id,
+                name=f"{category.name} Item {idx:04d}",
+                description=f"Generated product #{idx}",
+                is_active=True,
+                order=100 + idx
+            )
+            for idx in range(1, scale + 1)
+        ]
+        session.add_all(products)
+        session.flush()
+        
+        session.add_all([
+            ProductVariant(
+                product_id=product.id,
+                name=f"Option {option}",
+                description=f"Generated option {option}",
+                price=round(5 + (product.id * 7 + option * 3) % 200 + 0.99, 2),
+                is_active=True,
+                stock_quantity=100,
+                order=option
+            )
+            for product in products
+            for option in range(1, 4)
+        ])
+
+
+def seed_database(scale: int = 0):
     """Add sample categories, products, and variants"""
     
     # Initialize database
@@ -240,6 +275,10 @@ def seed_database():
         all_variants = phone_variants + laptop_variants + tshirt_variants + jeans_variants + pizza_variants
         session.add_all(all_variants)
         
+        # Generated products for load testing
+        if scale:
+            seed_bulk_products(session, [electronics, clothing, food], scale)
+        
         # Commit all changes
         session.commit()
         
@@ -247,6 +286,8 @@ def seed_database():
         print(f"   - {len([electronics, clothing, food])} categories")
         print(f"   - {len([smartphone, laptop, tshirt, jeans, pizza])} products")
         print(f"   - {len(all_variants)} variants")
+        if scale:
+            print(f"   - {scale} generated products per category")
         
     except Exception as e:
         session.rollback()
@@ -256,4 +297,7 @@ def seed_database():
 
 
 if __name__ == "__main__":
-    seed_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Populate the database with sample data")
+    parser.add_argument('--scale', type=int, default=0, help="Generated products to add per category")
+    args = parser.parse_args()
+    seed_database(scale=args.scale)
\ No newline at end of file
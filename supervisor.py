@@ -0,0 +1,126 @@
+"""
+Supervisor mode: one process polls Telegram and shards updates by user id
+across worker processes, each running its own dispatcher.
+Every update of a user lands on the same worker and is handled in order, so
+FSM state and per-user caches stay local to that worker.
+Usage: python main.py --workers N
+"""
+import asyncio
+import logging
+import multiprocessing
+import signal
+
+from aiogram.exceptions import TelegramNetworkError
+
+from config import METRICS_PORT, WORKER_QUEUE_SIZE, SHUTDOWN_TIMEOUT
+from utils.sharding import shard_for, update_user_id
+
+logger = logging.getLogger(__name__)
+
+POLL_TIMEOUT = 30  # Long polling timeout in seconds
+
+
+def run_supervisor(workers: int):
+    """Start worker processes and feed them updates until interrupted"""
+    from database import init_db
+
+    init_db()
+    # A deploy's SIGTERM stops the supervisor like Ctrl+C: workers drain their queues first
+    signal.signal(signal.SIGTERM, _interrupt)
+
+    # Spawn rather than fork: engines and pools must not be shared across processes
+    context = multiprocessing.get_context('spawn')
+    queues = [context.Queue(maxsize=WORKER_QUEUE_SIZE) for _ in range(workers)]
+    processes = [
+        context.Process(target=worker_process, args=(index, queue), name=f"worker-{index}")
+        for index, queue in enumerate(queues)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {workers} workers")
+
+    try:
+        asyncio.run(_poll(queues))
+    finally:
+        # Workers finish what they have queued, then exit
+        for queue in queues:
+            queue.put(None)
+        for process in processes:
+            process.join()
+
+
+async def _poll(queues):
+    """Long-poll Telegram and route each update to its user's worker"""
+    from main import create_bot, create_dispatcher
+
+    bot = create_bot()
+    allowed_updates = create_dispatcher().resolve_used_update_types()
+    offset = None
+    try:
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=POLL_TIMEOUT, allowed_updates=allowed_updates)
+            except TelegramNetworkError as e:
+                logger.warning(f"Polling failed, retrying: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            for update in updates:
+                raw_update = update.model_dump(mode='json', by_alias=True, exclude_none=True)
+                queue = queues[shard_for(raw_update, len(queues))]
+                # Blocks when the worker falls behind, which throttles polling
+                await asyncio.to_thread(queue.put, raw_update)
+                offset = update.update_id + 1
+    finally:
+        await bot.session.close()
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def worker_process(index: int, queue):
+    """Worker process entry point"""
+    # The supervisor decides when workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    asyncio.run(_work(index, queue))
+
+
+async def _work(index: int, queue):
+    from main import create_bot, startup, running_services
+
+    bot = create_bot()
+    dp = await startup()
+    loop = asyncio.get_running_loop()
+    # Last queued task per user; the next update of that user waits for it
+    tails = {}
+
+    # Shared scheduled jobs run in the first worker only
+    async with running_services(bot, metrics_port=METRICS_PORT + index if METRICS_PORT else 0, jobs=index == 0):
+        logger.info(f"Worker {index} ready")
+        while True:
+            raw_update = await loop.run_in_executor(None, queue.get)
+            if raw_update is None:
+                break
+
+            user_id = update_user_id(raw_update)
+            task = asyncio.create_task(_feed_in_order(dp, bot, raw_update, tails.get(user_id)))
+            tails[user_id] = task
+            task.add_done_callback(lambda done, key=user_id: tails.get(key) is done and tails.pop(key))
+
+        # Let queued and running updates finish, up to the shutdown timeout
+        if tails:
+            done, pending = await asyncio.wait(list(tails.values()), timeout=SHUTDOWN_TIMEOUT)
+            if pending:
+                logger.warning(f"Worker {index} shutdown timeout: {len(pending)} updates still running")
+    await bot.session.close()
+
+
+async def _feed_in_order(dp, bot, raw_update, previous):
+    if previous is not None:
+        await asyncio.wait([previous])
+    try:
+        await dp.feed_raw_update(bot, raw_update)
+    except Exception:
+        logger.exception(f"Error handling update {raw_update.get('update_id')}")
@@ -0,0 +1,33 @@
+from datetime import date
+
+from utils import export
+from utils.export import build_report
+
+
+class _Session:
+    def close(self):
+        pass
+
+
+class _Reports:
+    @staticmethod
+    def revenue_by_day(session, **kwargs):
+        return [(date(2024, 1, 1), 1, 12.5)]
+
+    @staticmethod
+    def top_variants(session, **kwargs):
+        return [("R&D <beta>", "Large & <b>", 1, 12.5)]
+
+    @staticmethod
+    def repeat_customers(session, **kwargs):
+        return 1, 0, 12.5, 0
+
+
+def test_report_escapes_catalog_names(monkeypatch):
+    monkeypatch.setattr(export, 'get_session', _Session)
+    monkeypatch.setattr(export, 'ReportRepository', _Reports)
+
+    report = build_report()
+
+    assert "R&amp;D &lt;beta&gt; - Large &amp; &lt;b&gt;" in report
+    assert "<beta>" not in report
@@ -6,7 +6,8 @@ from utils.keyboards import (
     get_cart_keyboard,
     get_note_keyboard,
     get_location_keyboard,
-    get_admin_keyboard
+    get_admin_keyboard,
+    get_route_keyboard
 )
 
 from utils.helpers import (
@@ -14,9 +15,23 @@ from utils.helpers import (
     format_price,
     format_cart_message,
     format_order_message,
+    render_order_body,
+    store_order_body,
     format_variant_caption,
+    format_route_message,
+    split_message,
     is_admin,
-    get_or_create_user
+    is_courier,
+    get_or_create_user,
+    get_order_view
+)
+
+from utils.callbacks import (
+    CatalogCallback,
+    CatalogAction,
+    AdminCallback,
+    OrderAction,
+    DeliveryCallback
 )
 
 __all__ = [
@@ -28,11 +43,23 @@ __all__ = [
     'get_note_keyboard',
     'get_location_keyboard',
     'get_admin_keyboard',
+    'get_route_keyboard',
     'validate_phone_number',
     'format_price',
     'format_cart_message',
     'format_order_message',
+    'render_order_body',
+    'store_order_body',
     'format_variant_caption',
+    'format_route_message',
+    'split_message',
     'is_admin',
-    'get_or_create_user'
+    'is_courier',
+    'get_or_create_user',
+    'get_order_view',
+    'CatalogCallback',
+    'CatalogAction',
+    'AdminCallback',
+    'OrderAction',
+    'DeliveryCallback'
 ]
\ No newline at end of file
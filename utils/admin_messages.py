@@ -0,0 +1,135 @@
+"""
+Order notifications in the admins' chats
+Every copy is recorded in order_admin_messages, so a status change can bring all of them
+up to date at once instead of only the copy the acting admin pressed.
+"""
+import asyncio
+import logging
+import time
+import weakref
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramBadRequest
+
+from config import ADMIN_SEND_CONCURRENCY, ADMIN_SEND_RATE
+from database import get_session, run_write, OrderRepository, OrderStatus
+from utils.helpers import format_order_message, get_order_view, store_order_body
+from utils.keyboards import get_admin_keyboard
+from utils.live_config import live_config
+
+logger = logging.getLogger(__name__)
+
+STATUS_HEADERS = {
+    OrderStatus.CONFIRMED: "✅ <b>ORDER CONFIRMED</b>",
+    OrderStatus.CANCELLED: "❌ <b>ORDER REJECTED</b>",
+    OrderStatus.DELIVERED: "📦 <b>ORDER DELIVERED</b>",
+}
+
+
+class _Pacer:
+    """Spaces calls `1 / rate` seconds apart; a flood-control wait delays every caller"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def pause(self, seconds: float):
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+# Bot API calls in flight for admin notifications, across all orders, and their pace
+_limiter = asyncio.Semaphore(ADMIN_SEND_CONCURRENCY)
+_pacer = _Pacer(ADMIN_SEND_RATE)
+
+# One sync at a time per order, so the last edit always shows the latest state
+_order_locks = weakref.WeakValueDictionary()
+
+
+def render_admin_message(order):
+    """Text and keyboard of an admin copy; only pending orders keep their buttons"""
+    text = format_order_message(order)
+    if order.status == OrderStatus.PENDING:
+        return text, get_admin_keyboard(order.id)
+    return f"{STATUS_HEADERS.get(order.status, order.status.upper())}\n\n{text}", None
+
+
+async def _call(method, *args, **kwargs):
+    """Bot API call within the limiter and pace; flood control pauses all calls, then this one retries once"""
+    async with _limiter:
+        await _pacer.wait()
+        try:
+            return await method(*args, **kwargs)
+        except TelegramRetryAfter as e:
+            _pacer.pause(e.retry_after)
+            await _pacer.wait()
+            return await method(*args, **kwargs)
+
+
+async def notify_admins(bot: Bot, order):
+    """Send a new order to every admin at once and record the copies"""
+    text, markup = render_admin_message(order)
+
+    async def send(admin_id):
+        try:
+            message = await _call(
+                bot.send_message, admin_id, text,
+                reply_markup=markup, parse_mode="HTML", disable_web_page_preview=True
+            )
+            return order.id, admin_id, message.message_id
+        except Exception as e:
+            logger.warning(f"Error sending order #{order.id} to admin {admin_id}: {e}")
+            return None
+
+    sent = [copy for copy in await asyncio.gather(*(send(admin_id) for admin_id in live_config.admin_ids)) if copy]
+    if sent:
+        await run_write(OrderRepository.add_admin_messages, sent)
+    return sent
+
+
+async def sync_admin_messages(bot: Bot, order_id: int, also=()) -> int:
+    """
+    Edit every admin copy of an order to show its current state; returns the number edited
+    `also` adds (chat id, message id) copies that may not be recorded, e.g. the one pressed
+    """
+    lock = _order_locks.get(order_id)
+    if lock is None:
+        lock = _order_locks[order_id] = asyncio.Lock()
+
+    async with lock:
+        session = get_session()
+        try:
+            copies = OrderRepository.get_admin_messages(session, order_id)
+        finally:
+            session.close()
+        order = get_order_view(order_id)
+        if order is None:
+            return 0
+        # Re-rendered only after the details changed (e.g. the address was resolved)
+        order = await store_order_body(order)
+        text, markup = render_admin_message(order)
+
+        async def edit(chat_id, message_id):
+            try:
+                await _call(
+                    bot.edit_message_text, text, chat_id=chat_id, message_id=message_id,
+                    reply_markup=markup, parse_mode="HTML", disable_web_page_preview=True
+                )
+                return True
+            except TelegramBadRequest as e:
+                # Already showing this state (another sync got there first)
+                if 'not modified' in str(e):
+                    return True
+                logger.warning(f"Error updating admin message {message_id} of order #{order_id}: {e}")
+            except Exception as e:
+                logger.warning(f"Error updating admin message {message_id} of order #{order_id}: {e}")
+            return False
+
+        targets = dict.fromkeys([*copies, *also])
+        return sum(await asyncio.gather(*(edit(chat_id, message_id) for chat_id, message_id in targets)))
@@ -0,0 +1,50 @@
+from enum import Enum
+from aiogram.filters.callback_data import CallbackData
+
+from config import CATALOG_VERSION
+
+
+class CatalogAction(str, Enum):
+    """Catalog button actions (kept to one or two chars to save callback bytes)"""
+    CATEGORIES = 'cs'  # page of categories
+    CATEGORY = 'c'  # page of products in a category
+    PRODUCT = 'p'  # variants of a product
+    ADD_VARIANT = 'a'  # add variant to cart
+    BACK_TO_PRODUCTS = 'b'  # products page starting at a product
+
+
+class CatalogCallback(CallbackData, prefix='ct'):
+    """
+    Catalog button payload, e.g. ct:c:12:0:0:1
+    Carries the catalog version so buttons sent before a catalog change are detected
+    """
+    action: CatalogAction
+    id: int = 0  # category, product or variant id depending on action
+    after: int = 0  # keyset anchor of the next page (0 = none)
+    before: int = 0  # keyset anchor of the previous page (0 = none)
+    v: int = CATALOG_VERSION
+
+    def page_cursor(self) -> dict:
+        """Keyset pagination arguments carried by this button"""
+        if self.before:
+            return {'before_id': self.before}
+        if self.after:
+            return {'after_id': self.after}
+        return {}
+
+
+class OrderAction(str, Enum):
+    """Admin order button actions"""
+    CONFIRM = 'c'
+    REJECT = 'r'
+
+
+class AdminCallback(CallbackData, prefix='ad'):
+    """Admin order button payload, e.g. ad:c:42"""
+    action: OrderAction
+    order_id: int
+
+
+class DeliveryCallback(CallbackData, prefix='dl'):
+    """Courier 'delivered' button payload, e.g. dl:42"""
+    order_id: int
@@ -0,0 +1,91 @@
+"""
+In-process domain events
+Handlers publish an event once their write has committed and return right away; the
+subscribers (admin notifications, customer messages, channel posts) run in the background,
+at most EVENT_CONCURRENCY at a time, and a failing subscriber does not affect the others.
+"""
+import asyncio
+import contextvars
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from aiogram import Bot
+
+from config import EVENT_CONCURRENCY
+from database import OrderView
+from utils.metrics import metrics, current_request
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class OrderCreated:
+    order: OrderView
+
+
+@dataclass(frozen=True, slots=True)
+class OrderConfirmed:
+    order: OrderView
+    admin_copy: Optional[Tuple[int, int]] = None  # (chat id, message id) the admin pressed
+
+
+@dataclass(frozen=True, slots=True)
+class OrderRejected:
+    order: OrderView
+    admin_copy: Optional[Tuple[int, int]] = None
+
+
+@dataclass(frozen=True, slots=True)
+class OrderDelivered:
+    order: OrderView
+
+
+class EventBus:
+    """Subscribers by event type; `await subscriber(bot, event)` runs for each published event"""
+
+    def __init__(self, concurrency: int = EVENT_CONCURRENCY):
+        self._subscribers = defaultdict(list)
+        self._limiter = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+
+    def subscribe(self, *event_types):
+        """Decorator registering a subscriber for the given event types"""
+        def register(subscriber):
+            for event_type in event_types:
+                self._subscribers[event_type].append(subscriber)
+            return subscriber
+        return register
+
+    def publish(self, bot: Bot, event) -> int:
+        """Start the event's subscribers in the background; returns how many were started"""
+        subscribers = self._subscribers.get(type(event), ())
+        for subscriber in subscribers:
+            # Keeps the log context, but the work is not counted against the handler that published
+            context = contextvars.copy_context()
+            context.run(current_request.set, None)
+            task = asyncio.create_task(self._run(subscriber, bot, event), context=context)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return len(subscribers)
+
+    async def _run(self, subscriber, bot: Bot, event):
+        event_name = type(event).__name__
+        async with self._limiter:
+            start = time.perf_counter()
+            try:
+                await subscriber(bot, event)
+            except Exception:
+                metrics.inc('event_subscriber_errors_total', event=event_name, subscriber=subscriber.__name__)
+                logger.exception(f"Subscriber {subscriber.__name__} failed on {event_name}")
+            metrics.observe('event_subscriber_seconds', time.perf_counter() - start, event=event_name)
+
+    async def drain(self, timeout: float = None):
+        """Wait for running subscribers, up to the timeout"""
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=timeout)
+
+
+event_bus = EventBus()
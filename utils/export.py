@@ -0,0 +1,171 @@
+"""
+Order exports (CSV, Parquet) and text reports, shared by /export, /report and export.py
+"""
+import csv
+from datetime import datetime, timedelta
+from html import escape
+
+from config import EXPORT_CHUNK_SIZE
+from database import get_session, ReportRepository, OrderStatus
+from database.reports import ORDER_COLUMNS, ITEM_COLUMNS
+from utils.helpers import format_price
+
+EXPORT_TABLES = {
+    'orders': (ReportRepository.iter_orders, ORDER_COLUMNS),
+    'items': (ReportRepository.iter_order_items, ITEM_COLUMNS),
+}
+EXPORT_FORMATS = ('csv', 'parquet')
+
+STATUSES = (OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.CANCELLED, OrderStatus.DELIVERED)
+
+
+class ExportFilters:
+    """Date range (end exclusive) and statuses of an export or report"""
+
+    def __init__(self, start: datetime = None, end: datetime = None, statuses=None):
+        self.start = start
+        self.end = end
+        self.statuses = tuple(statuses) if statuses else None
+
+    def as_kwargs(self) -> dict:
+        kwargs = {'start': self.start, 'end': self.end}
+        if self.statuses:
+            kwargs['statuses'] = self.statuses
+        return kwargs
+
+    def describe(self) -> str:
+        if self.start or self.end:
+            period = f"{self.start:%Y-%m-%d}" if self.start else "…"
+            period += f" – {self.end - timedelta(days=1):%Y-%m-%d}" if self.end else " – …"
+        else:
+            period = "all time"
+        if self.statuses:
+            period += f" ({', '.join(self.statuses)})"
+        return period
+
+
+def parse_date(value: str) -> datetime:
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def parse_export_args(args):
+    """
+    Parse free-order /export and /report arguments:
+    table (orders|items), format (csv|parquet), up to two dates (YYYY-MM-DD, inclusive)
+    and comma-separated statuses. Raises ValueError on anything else
+    """
+    table, fmt, dates, statuses = 'orders', 'csv', [], []
+    for arg in args:
+        arg = arg.lower()
+        if arg in EXPORT_TABLES:
+            table = arg
+        elif arg in EXPORT_FORMATS:
+            fmt = arg
+        elif all(status in STATUSES for status in arg.split(',')):
+            statuses.extend(arg.split(','))
+        else:
+            try:
+                dates.append(parse_date(arg))
+            except ValueError:
+                raise ValueError(f"Unknown argument: {arg}")
+    if len(dates) > 2:
+        raise ValueError("At most two dates are allowed")
+
+    dates.sort()
+    start = dates[0] if dates else None
+    end = dates[-1] + timedelta(days=1) if dates else None
+    return table, fmt, ExportFilters(start, end, statuses)
+
+
+def write_csv(chunks, columns, file):
+    """Write row chunks to an open text file"""
+    writer = csv.writer(file)
+    writer.writerow(columns)
+    rows = 0
+    for chunk in chunks:
+        writer.writerows(chunk)
+        rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks, columns, path):
+    """Write row chunks to a Parquet file, one row group per chunk (needs pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            batch = pa.Table.from_pydict({
+                name: [row[index] for row in chunk] for index, name in enumerate(columns)
+            })
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema)
+            writer.write_table(batch)
+            rows += len(chunk)
+        if writer is None:
+            # Nothing matched: still produce a file with the header
+            pq.write_table(pa.table({name: [] for name in columns}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def export_orders(path: str, table: str = 'orders', fmt: str = 'csv', filters: ExportFilters = None,
+                  chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+    """Stream a table of orders or order items to a file; returns the number of rows written"""
+    iter_rows, columns = EXPORT_TABLES[table]
+    filters = filters or ExportFilters()
+
+    session = get_session()
+    try:
+        chunks = iter_rows(session, chunk_size=chunk_size, **filters.as_kwargs())
+        if fmt == 'parquet':
+            return write_parquet(chunks, columns, path)
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            return write_csv(chunks, columns, file)
+    finally:
+        session.close()
+
+
+def build_report(filters: ExportFilters = None) -> str:
+    """Revenue by day, top variants and repeat customers as an HTML message"""
+    filters = filters or ExportFilters()
+    kwargs = filters.as_kwargs()
+
+    session = get_session()
+    try:
+        days = ReportRepository.revenue_by_day(session, **kwargs)
+        variants = ReportRepository.top_variants(session, **kwargs)
+        customers, repeat, revenue, repeat_revenue = ReportRepository.repeat_customers(session, **kwargs)
+    finally:
+        session.close()
+
+    report = f"📈 <b>Sales Report</b> {filters.describe()}\n\n"
+
+    report += "📅 <b>Revenue by Day:</b>\n"
+    for day, orders, day_revenue in days:
+        report += f"  {day}: {orders} orders, {format_price(day_revenue or 0)}\n"
+    if not days:
+        report += "  No sales\n"
+
+    report += "\n🏆 <b>Top Variants:</b>\n"
+    for index, (product, variant, quantity, variant_revenue) in enumerate(variants, 1):
+        report += f"  {index}. {escape(product)} - {escape(variant)}: {quantity} sold, {format_price(variant_revenue or 0)}\n"
+    if not variants:
+        report += "  No sales\n"
+
+    report += "\n🔁 <b>Repeat Customers:</b>\n"
+    report += f"  {repeat} of {customers} customers ordered more than once"
+    if customers:
+        report += f" ({repeat / customers:.0%})"
+    report += "\n"
+    if revenue:
+        report += f"  Their share of revenue: {format_price(repeat_revenue)} ({repeat_revenue / revenue:.0%})\n"
+
+    return report
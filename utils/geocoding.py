@@ -0,0 +1,204 @@
+"""
+Reverse geocoding of delivery locations
+Lookups go through an in-memory LRU, then the geocode_cache table, then the provider.
+Coordinates are rounded before lookup so nearby points share one cache entry.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from config import (
+    GEOCODER, GEOCODER_URL, GEOCODER_USER_AGENT, GEOCODER_TIMEOUT, GEOCODE_PRECISION, GEOCODE_CACHE_SIZE
+)
+from database import get_session, run_write, GeocodeRepository, OrderRepository
+
+logger = logging.getLogger(__name__)
+
+
+class GeocodeProvider(ABC):
+    """Resolves coordinates to a human readable address"""
+    name = 'base'
+
+    @abstractmethod
+    async def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        ...
+
+    async def close(self):
+        pass
+
+
+class OfflineProvider(GeocodeProvider):
+    """Stand-in that never leaves the process, for tests and benchmarks"""
+    name = 'offline'
+
+    async def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        return f"Near {latitude:.{GEOCODE_PRECISION}f}, {longitude:.{GEOCODE_PRECISION}f}"
+
+
+class NominatimProvider(GeocodeProvider):
+    """OpenStreetMap Nominatim reverse geocoding"""
+    name = 'nominatim'
+
+    # The public instance allows one request per second
+    MIN_INTERVAL = 1.0
+
+    def __init__(self, url: str = GEOCODER_URL, user_agent: str = GEOCODER_USER_AGENT,
+                 timeout: float = GEOCODER_TIMEOUT):
+        self.url = url
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self._session = None
+        self._lock = asyncio.Lock()
+        self._last_request = 0.0
+
+    async def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        import aiohttp
+
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                headers={'User-Agent': self.user_agent},
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            wait = self._last_request + self.MIN_INTERVAL - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                params = {'lat': latitude, 'lon': longitude, 'format': 'jsonv2', 'zoom': 18}
+                async with self._session.get(self.url, params=params) as response:
+                    response.raise_for_status()
+                    data = await response.json()
+            finally:
+                self._last_request = loop.time()
+        return data.get('display_name')
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+PROVIDERS = {
+    'offline': OfflineProvider,
+    'nominatim': NominatimProvider,
+}
+
+
+class Geocoder:
+    """Cached reverse geocoder; concurrent lookups of the same spot share one provider call"""
+
+    def __init__(self, provider: Optional[GeocodeProvider], precision: int = GEOCODE_PRECISION,
+                 cache_size: int = GEOCODE_CACHE_SIZE):
+        self.provider = provider
+        self.scale = 10 ** precision
+        self.cache_size = cache_size
+        self._lru = OrderedDict()  # (lat_key, lon_key) -> address
+        self._pending = {}  # (lat_key, lon_key) -> future of an in-flight lookup
+
+    @property
+    def enabled(self) -> bool:
+        return self.provider is not None
+
+    def key(self, latitude: float, longitude: float):
+        return round(latitude * self.scale), round(longitude * self.scale)
+
+    async def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        """Address of a location, None if it cannot be resolved"""
+        if not self.enabled:
+            return None
+
+        key = self.key(latitude, longitude)
+        address = self._lru.get(key)
+        if address is not None:
+            self._lru.move_to_end(key)
+            return address
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            address = await self._lookup(key, latitude, longitude)
+            future.set_result(address)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark as retrieved; waiters still get the error
+            raise
+        finally:
+            del self._pending[key]
+        return address
+
+    async def _lookup(self, key, latitude: float, longitude: float) -> Optional[str]:
+        session = get_session()
+        try:
+            address = GeocodeRepository.get(session, *key)
+        finally:
+            session.close()
+
+        if address is None:
+            # Resolve the rounded point, which is what every later hit of this key means
+            address = await self.provider.reverse(key[0] / self.scale, key[1] / self.scale)
+            if address is None:
+                return None
+            await run_write(GeocodeRepository.put, *key, address[:500], provider=self.provider.name)
+
+        self._remember(key, address)
+        return address
+
+    def _remember(self, key, address: str):
+        self._lru[key] = address
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.cache_size:
+            self._lru.popitem(last=False)
+
+    async def close(self):
+        if self.provider is not None:
+            await self.provider.close()
+
+
+def create_geocoder(name: str = GEOCODER) -> Geocoder:
+    """Geocoder for the configured provider; disabled when none is configured"""
+    if not name:
+        return Geocoder(None)
+    if name not in PROVIDERS:
+        logger.warning(f"Unknown geocoder '{name}', addresses will not be resolved")
+        return Geocoder(None)
+    return Geocoder(PROVIDERS[name]())
+
+
+geocoder = create_geocoder()
+
+# Keep references to running lookups so they are not garbage collected mid-flight
+_background_tasks = set()
+
+
+async def resolve_order_address(order_id: int, latitude: float, longitude: float) -> Optional[str]:
+    """Resolve and store the address of an order"""
+    try:
+        address = await geocoder.reverse(latitude, longitude)
+    except Exception as e:
+        logger.warning(f"Geocoding order #{order_id} failed: {e}")
+        return None
+    if address:
+        await run_write(OrderRepository.set_address, order_id, address[:500])
+    return address
+
+
+def schedule(coro) -> asyncio.Task:
+    """Run a geocoding coroutine in the background"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def drain(timeout: float = None):
+    """Wait for background lookups still running, up to the timeout"""
+    if _background_tasks:
+        await asyncio.wait(list(_background_tasks), timeout=timeout)
@@ -1,6 +1,9 @@
 import re
+from html import escape
+from dataclasses import replace
 from typing import Optional
-from database import get_session, UserRepository
+from database import get_session, run_write, UserRepository, OrderRepository
+from utils.live_config import live_config
 
 
 def validate_phone_number(phone: str) -> Optional[str]:
@@ -30,7 +33,7 @@ def format_price(price: float) -> str:
 
 
 def format_cart_message(cart_items) -> str:
-    """Format cart items into a readable message"""
+    """Format cart lines (CartLineView) into a readable message"""
     if not cart_items:
         return "🛒 Your cart is empty."
     
@@ -38,15 +41,12 @@ def format_cart_message(cart_items) -> str:
     
     total = 0
     for item in cart_items:
-        variant = item.variant
-        product = variant.product
-        item_total = variant.price * item.quantity
-        total += item_total
+        total += item.subtotal
         
-        message += f"<b>{product.name}</b>\n"
-        message += f"  Variant: {variant.name}\n"
-        message += f"  Price: {format_price(variant.price)} x {item.quantity}\n"
-        message += f"  Subtotal: {format_price(item_total)}\n\n"
+        message += f"<b>{item.product_name}</b>\n"
+        message += f"  Variant: {item.variant_name}\n"
+        message += f"  Price: {format_price(item.price)} x {item.quantity}\n"
+        message += f"  Subtotal: {format_price(item.subtotal)}\n\n"
     
     message += f"━━━━━━━━━━━━━━━━━━\n"
     message += f"<b>Total: {format_price(total)}</b>"
@@ -54,41 +54,83 @@ def format_cart_message(cart_items) -> str:
     return message
 
 
-def format_order_message(order) -> str:
-    """Format order details for admin and customer"""
+def render_order_body(order) -> str:
+    """Order details (OrderView) up to the status line; stored on the order once rendered"""
     message = f"📦 <b>Order #{order.id}</b>\n\n"
     
     # Customer info
-    user = order.user
+    user = order.customer
     message += f"👤 <b>Customer:</b>\n"
     if user.first_name or user.last_name:
-        message += f"  Name: {user.first_name or ''} {user.last_name or ''}".strip() + "\n"
-    message += f"  Phone: {user.phone_number}\n"
+        message += f"  Name: {escape(user.first_name or '')} {escape(user.last_name or '')}".strip() + "\n"
+    message += f"  Phone: {escape(user.phone_number)}\n"
     if user.username:
-        message += f"  Username: @{user.username}\n"
+        message += f"  Username: @{escape(user.username)}\n"
     message += "\n"
     
     # Order items
     message += f"🛍 <b>Items:</b>\n"
     for item in order.items:
-        message += f"  • {item.product_name} - {item.variant_name}\n"
+        message += f"  • {escape(item.product_name)} - {escape(item.variant_name)}\n"
         message += f"    {format_price(item.price_at_purchase)} x {item.quantity} = {format_price(item.price_at_purchase * item.quantity)}\n"
     
     message += f"\n💰 <b>Total: {format_price(order.total_amount)}</b>\n\n"
     
     # Note
     if order.note:
-        message += f"📝 <b>Note:</b> {order.note}\n\n"
+        message += f"📝 <b>Note:</b> {escape(order.note)}\n\n"
     
     # Location
     if order.location_latitude and order.location_longitude:
         message += f"📍 <b>Delivery Location:</b>\n"
         if order.location_address:
-            message += f"  {order.location_address}\n"
-        message += f"  Coordinates: {order.location_latitude}, {order.location_longitude}\n"
+            message += f"  {escape(order.location_address)}\n"
+        message += (
+            f'  <a href="https://maps.google.com/?q={order.location_latitude},{order.location_longitude}">'
+            f'{order.location_latitude}, {order.location_longitude}</a>\n'
+        )
     
     message += f"\n🕐 <b>Order Time:</b> {order.created_at.strftime('%Y-%m-%d %H:%M:%S')}\n"
-    message += f"📊 <b>Status:</b> {order.status.upper()}"
+    
+    return message
+
+
+def format_order_message(order) -> str:
+    """Format order details (OrderView) for admin and customer"""
+    body = order.rendered_body or render_order_body(order)
+    return f"{body}📊 <b>Status:</b> {order.status.upper()}"
+
+
+async def store_order_body(order):
+    """Render an order's body once and keep it on the order; returns the view carrying it"""
+    if order.rendered_body is not None:
+        return order
+    body = render_order_body(order)
+    await run_write(OrderRepository.set_rendered_body, order.id, body)
+    return replace(order, rendered_body=body)
+
+
+def format_route_message(deliveries, start=None) -> str:
+    """Format a courier's open stops (RouteStopView) as one route message with a maps link"""
+    message = f"🚚 <b>Your Route ({len(deliveries)} stops)</b>\n\n"
+    
+    for delivery in deliveries:
+        order = delivery.order
+        message += f"<b>{delivery.stop}. Order #{order.id}</b> - {format_price(order.total_amount)}\n"
+        message += f"  📞 {escape(order.customer.phone_number)}\n"
+        if order.location_address:
+            message += f"  📍 {escape(order.location_address)}\n"
+        else:
+            message += f"  📍 {order.location_latitude}, {order.location_longitude}\n"
+        if order.note:
+            message += f"  📝 {escape(order.note)}\n"
+        message += "\n"
+    
+    # Whole route in one maps link instead of a location message per stop
+    points = [start] if start else []
+    points += [(d.order.location_latitude, d.order.location_longitude) for d in deliveries]
+    path = "/".join(f"{lat},{lon}" for lat, lon in points)
+    message += f'🗺 <a href="https://www.google.com/maps/dir/{path}">Open route in maps</a>'
     
     return message
 
@@ -103,10 +145,27 @@ def format_variant_caption(variant, index: int) -> str:
     return caption
 
 
+def split_message(text: str, limit: int = 4096):
+    """Split a long message on line boundaries to fit Telegram's length limit"""
+    parts, current = [], ""
+    for line in text.splitlines(keepends=True):
+        if current and len(current) + len(line) > limit:
+            parts.append(current)
+            current = ""
+        current += line
+    if current:
+        parts.append(current)
+    return parts
+
+
 def is_admin(user_id: int) -> bool:
     """Check if user is admin"""
-    from config import ADMIN_IDS
-    return user_id in ADMIN_IDS
+    return live_config.is_admin(user_id)
+
+
+def is_courier(user_id: int) -> bool:
+    """Check if user is courier"""
+    return live_config.is_courier(user_id)
 
 
 def get_or_create_user(telegram_id: int, phone_number: str, username=None, first_name=None, last_name=None):
@@ -115,7 +174,7 @@ def get_or_create_user(telegram_id: int, phone_number: str, username=None, first
     try:
         user = UserRepository.get_by_telegram_id(session, telegram_id)
         if not user:
-            user = UserRepository.create(
+            UserRepository.create(
                 session=session,
                 telegram_id=telegram_id,
                 phone_number=phone_number,
@@ -123,6 +182,15 @@ def get_or_create_user(telegram_id: int, phone_number: str, username=None, first
                 first_name=first_name,
                 last_name=last_name
             )
+            user = UserRepository.get_by_telegram_id(session, telegram_id)
         return user
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+def get_order_view(order_id: int):
+    """Load an order as a view in a short-lived session, so no session is held across Telegram calls"""
+    session = get_session()
+    try:
+        return OrderRepository.get_view(session, order_id)
+    finally:
+        session.close()
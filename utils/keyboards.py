@@ -1,6 +1,8 @@
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from utils.callbacks import CatalogCallback, CatalogAction, AdminCallback, OrderAction, DeliveryCallback
+
 
 def get_main_menu_keyboard():
     """Main menu keyboard"""
@@ -14,36 +16,62 @@ def get_main_menu_keyboard():
     return keyboard
 
 
-def get_categories_keyboard(categories):
-    """Inline keyboard with categories"""
+def _page_navigation(items, has_prev, has_next, action, item_id=0):
+    """Prev/next buttons anchored at the first and last item of the page"""
+    buttons = []
+    if has_prev and items:
+        buttons.append(InlineKeyboardButton(
+            text="◀️ Prev",
+            callback_data=CatalogCallback(action=action, id=item_id, before=items[0].id).pack()
+        ))
+    if has_next and items:
+        buttons.append(InlineKeyboardButton(
+            text="Next ▶️",
+            callback_data=CatalogCallback(action=action, id=item_id, after=items[-1].id).pack()
+        ))
+    return buttons
+
+
+def get_categories_keyboard(categories, has_prev=False, has_next=False):
+    """Inline keyboard with one page of categories"""
     builder = InlineKeyboardBuilder()
     
     for category in categories:
         builder.button(
             text=f"📁 {category.name}",
-            callback_data=f"cat_{category.id}"
+            callback_data=CatalogCallback(action=CatalogAction.CATEGORY, id=category.id)
         )
     
     builder.adjust(2)  # 2 buttons per row
+    
+    navigation = _page_navigation(categories, has_prev, has_next, CatalogAction.CATEGORIES)
+    if navigation:
+        builder.row(*navigation)
+    
     return builder.as_markup()
 
 
-def get_products_keyboard(products, category_id):
-    """Inline keyboard with products"""
+def get_products_keyboard(products, category_id, has_prev=False, has_next=False):
+    """Inline keyboard with one page of products"""
     builder = InlineKeyboardBuilder()
     
     for product in products:
         builder.button(
             text=f"📦 {product.name}",
-            callback_data=f"prod_{product.id}"
+            callback_data=CatalogCallback(action=CatalogAction.PRODUCT, id=product.id)
         )
     
-    builder.button(
+    builder.adjust(1)  # 1 button per row
+    
+    navigation = _page_navigation(products, has_prev, has_next, CatalogAction.CATEGORY, category_id)
+    if navigation:
+        builder.row(*navigation)
+    
+    builder.row(InlineKeyboardButton(
         text="⬅️ Back to Categories",
-        callback_data="back_categories"
-    )
+        callback_data=CatalogCallback(action=CatalogAction.CATEGORIES).pack()
+    ))
     
-    builder.adjust(1)  # 1 button per row
     return builder.as_markup()
 
 
@@ -55,13 +83,13 @@ def get_variants_keyboard(variants, product_id):
     for idx, variant in enumerate(variants, 1):
         builder.button(
             text=f"➕ Add Variant {idx}",
-            callback_data=f"addvar_{variant.id}"
+            callback_data=CatalogCallback(action=CatalogAction.ADD_VARIANT, id=variant.id)
         )
     
     # Back button
     builder.button(
         text="⬅️ Back to Products",
-        callback_data=f"backprod_{product_id}"
+        callback_data=CatalogCallback(action=CatalogAction.BACK_TO_PRODUCTS, id=product_id)
     )
     
     # Adjust layout: all variant buttons in one row if <= 4, otherwise wrap
@@ -90,7 +118,7 @@ def get_cart_keyboard(has_items=False):
     
     builder.button(
         text="⬅️ Continue Shopping",
-        callback_data="back_categories"
+        callback_data=CatalogCallback(action=CatalogAction.CATEGORIES)
     )
     
     builder.adjust(1)
@@ -132,12 +160,26 @@ def get_admin_keyboard(order_id):
     
     builder.button(
         text="✅ Confirm Order",
-        callback_data=f"admin_confirm_{order_id}"
+        callback_data=AdminCallback(action=OrderAction.CONFIRM, order_id=order_id)
     )
     builder.button(
         text="❌ Reject Order",
-        callback_data=f"admin_reject_{order_id}"
+        callback_data=AdminCallback(action=OrderAction.REJECT, order_id=order_id)
     )
     
     builder.adjust(2)
-    return builder.as_markup()
\ No newline at end of file
+    return builder.as_markup()
+
+
+def get_route_keyboard(deliveries):
+    """Courier keyboard with a 'delivered' button per open stop"""
+    builder = InlineKeyboardBuilder()
+    
+    for delivery in deliveries:
+        builder.button(
+            text=f"📦 {delivery.stop}. Delivered #{delivery.order_id}",
+            callback_data=DeliveryCallback(order_id=delivery.order_id)
+        )
+    
+    builder.adjust(1)
+    return builder.as_markup()
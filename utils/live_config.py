@@ -0,0 +1,133 @@
+"""
+Settings that change without a restart: the admin roster, the couriers and the order channel,
+per tenant. Admins are ADMIN_IDS from the environment (or the tenants file) plus the admins
+table. Both sources, COURIER_IDS and CHANNEL_ID are re-read every CONFIG_RELOAD_INTERVAL
+seconds; a change swaps in new snapshots at once, so a check never sees half of an update.
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+from aiogram.filters import BaseFilter
+from aiogram.types import TelegramObject, User
+from dotenv import dotenv_values
+
+from config import ADMIN_IDS, CHANNEL_ID, COURIER_IDS, ENV_FILE
+from database import get_session, AdminRepository
+from database.tenancy import DEFAULT_TENANT, current_tenant
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_ids(value: str) -> FrozenSet[int]:
+    return frozenset(int(id.strip()) for id in value.split(',') if id.strip())
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    admin_ids: FrozenSet[int]
+    channel_id: str
+    courier_ids: FrozenSet[int] = frozenset()
+
+
+# Updates of a tenant that is not configured get no admins or couriers
+NO_SETTINGS = Snapshot(frozenset(), '')
+
+
+class LiveConfig:
+    """Current snapshot of the runtime settings of each tenant; reload() picks up changes"""
+
+    def __init__(self, env_file: str = ENV_FILE):
+        self.env_file = env_file
+        self._env_mtime = self._mtime()
+        # Configured admins, channel and couriers per tenant; .env edits replace the default tenant's
+        self._sources = {DEFAULT_TENANT: (frozenset(ADMIN_IDS), CHANNEL_ID, frozenset(COURIER_IDS))}
+        self.snapshots = {DEFAULT_TENANT: Snapshot(*self._sources[DEFAULT_TENANT])}
+
+    def add_tenant(self, tenant: str, admin_ids, channel_id: str = '', courier_ids=()):
+        """Configure another store (multi-tenant mode)"""
+        self._sources[tenant] = (frozenset(admin_ids), channel_id, frozenset(courier_ids))
+        self.snapshots = {**self.snapshots, tenant: Snapshot(*self._sources[tenant])}
+
+    @property
+    def snapshot(self) -> Snapshot:
+        return self.snapshots.get(current_tenant.get(), NO_SETTINGS)
+
+    @property
+    def admin_ids(self) -> FrozenSet[int]:
+        return self.snapshot.admin_ids
+
+    @property
+    def channel_id(self) -> str:
+        return self.snapshot.channel_id
+
+    @property
+    def courier_ids(self) -> FrozenSet[int]:
+        return self.snapshot.courier_ids
+
+    def is_admin(self, user_id: int) -> bool:
+        return user_id in self.snapshot.admin_ids
+
+    def is_courier(self, user_id: int) -> bool:
+        return user_id in self.snapshot.courier_ids
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.env_file).st_mtime
+        except OSError:
+            return None
+
+    def _read_env_file(self):
+        """Take ADMIN_IDS, CHANNEL_ID and COURIER_IDS from .env when it changed since the last read"""
+        mtime = self._mtime()
+        if mtime is None or mtime == self._env_mtime:
+            return
+        self._env_mtime = mtime
+        values = dotenv_values(self.env_file)
+        admin_ids, channel_id, courier_ids = self._sources[DEFAULT_TENANT]
+        if 'ADMIN_IDS' in values:
+            admin_ids = _parse_ids(values['ADMIN_IDS'] or '')
+        if 'CHANNEL_ID' in values:
+            channel_id = values['CHANNEL_ID'] or ''
+        if 'COURIER_IDS' in values:
+            courier_ids = _parse_ids(values['COURIER_IDS'] or '')
+        self._sources[DEFAULT_TENANT] = (admin_ids, channel_id, courier_ids)
+
+    def reload(self) -> bool:
+        """Re-read .env and the admins table; returns True when a snapshot changed"""
+        self._read_env_file()
+        token = current_tenant.set(None)
+        session = get_session()
+        try:
+            db_admin_ids = AdminRepository.get_ids_by_tenant(session)
+        finally:
+            session.close()
+            current_tenant.reset(token)
+
+        snapshots = {
+            tenant: Snapshot(admin_ids | frozenset(db_admin_ids.get(tenant, ())), channel_id, courier_ids)
+            for tenant, (admin_ids, channel_id, courier_ids) in self._sources.items()
+        }
+        if snapshots == self.snapshots:
+            return False
+        for tenant, snapshot in snapshots.items():
+            if snapshot != self.snapshots.get(tenant):
+                logger.info(f"Configuration of {tenant} reloaded: {len(snapshot.admin_ids)} admins, "
+                            f"{len(snapshot.courier_ids)} couriers, channel {snapshot.channel_id or 'off'}")
+        self.snapshots = snapshots
+        return True
+
+    async def refresh(self):
+        await asyncio.to_thread(self.reload)
+
+
+live_config = LiveConfig()
+
+
+class IsAdmin(BaseFilter):
+    """Passes updates from admins; set on a router, it guards all of its handlers"""
+
+    async def __call__(self, event: TelegramObject, event_from_user: Optional[User] = None) -> bool:
+        return event_from_user is not None and live_config.is_admin(event_from_user.id)
@@ -0,0 +1,114 @@
+"""
+Logging pipeline
+Records are queued by the thread that logs them (the event loop) and written by a listener
+thread, so a slow stdout or disk never blocks update handling. Each record carries the
+update being handled (tenant, update_id, user_id, handler) from log_context. High-volume
+records, logged with extra=SAMPLED, are kept at LOG_SAMPLE_RATE.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Record attributes written as JSON fields when present
+CONTEXT_FIELDS = ('tenant', 'update_id', 'user_id', 'handler', 'latency_ms')
+
+# extra= of records logged once per update or more; only a sample of them is written
+SAMPLED = {'sampled': True}
+
+# Fields of the update being handled in the current task
+log_context: ContextVar[dict] = ContextVar('log_context', default={})
+
+_listener = None
+
+
+def bind(**fields):
+    """Add fields to the log context; returns the token for log_context.reset"""
+    return log_context.set({**log_context.get(), **fields})
+
+
+class ContextFilter(logging.Filter):
+    """Keep a sample of the high-volume records and copy the log context onto the rest"""
+
+    def __init__(self, sample_rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, 'sampled', False) and random.random() >= self.sample_rate:
+            return False
+        for field, value in log_context.get().items():
+            if not hasattr(record, field):
+                setattr(record, field, value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records with their message and traceback rendered to text, but unformatted,
+    so the listener's formatter still sees the separate fields
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> logging.handlers.QueueListener:
+    """Route all logging of the process through the queue; the listener stops at exit"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream)
+    _listener.start()
+    # Writes whatever is still queued
+    atexit.register(_listener.stop)
+    return _listener
@@ -0,0 +1,205 @@
+"""
+In-process metrics: latency histograms, counters and per-update stats
+"""
+import bisect
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, Prometheus style
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class Histogram:
+    """Fixed-bucket histogram; percentiles are interpolated from bucket counts"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'total')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th quantile (0 < q <= 1)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for idx, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank:
+                lower = self.buckets[idx - 1] if idx else 0.0
+                upper = self.buckets[idx]
+                if upper == float('inf'):
+                    return lower
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-2]
+
+
+class RequestStats:
+    """Database and Bot API work done while handling one update"""
+
+    __slots__ = ('db_queries', 'db_time', 'api_calls', 'api_time')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.api_calls = 0
+        self.api_time = 0.0
+
+
+# Stats of the update being handled in the current task
+current_request: ContextVar[Optional[RequestStats]] = ContextVar('current_request', default=None)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Holds every histogram and counter of the process"""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def register_collector(self, prefix: str, collector: Callable[[], Dict[str, float]]):
+        """Register a callable whose dict values are exported as gauges, e.g. throttling stats"""
+        self.collectors[prefix] = collector
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for (name, labels), value in sorted(self.counters.items()):
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for prefix, collector in self.collectors.items():
+            for key, value in collector().items():
+                lines.append(f"{prefix}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self):
+        """Human readable per-handler summary with p50/p95/p99 latencies"""
+        lines = []
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            if name != 'handler_seconds' or not histogram.count:
+                continue
+            label_dict = dict(labels)
+            count = histogram.count
+            db_queries = self.counters.get(('handler_db_queries_total', labels), 0)
+            db_time = self.counters.get(('handler_db_seconds_total', labels), 0)
+            api_calls = self.counters.get(('handler_api_calls_total', labels), 0)
+            api_time = self.counters.get(('handler_api_seconds_total', labels), 0)
+            lines.append(
+                f"{label_dict.get('handler')}: n={count} "
+                f"p50={histogram.percentile(0.5) * 1000:.1f}ms "
+                f"p95={histogram.percentile(0.95) * 1000:.1f}ms "
+                f"p99={histogram.percentile(0.99) * 1000:.1f}ms "
+                f"db={db_queries / count:.1f}q/{db_time / count * 1000:.1f}ms "
+                f"api={api_calls / count:.1f}c/{api_time / count * 1000:.1f}ms"
+            )
+        for prefix, collector in self.collectors.items():
+            values = ", ".join(f"{key}={value}" for key, value in collector().items())
+            lines.append(f"{prefix}: {values}")
+        return lines
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+metrics = MetricsRegistry()
+
+
+def record_handler(handler_name: str, elapsed: float, stats: RequestStats):
+    """Record wall time and the DB / Bot API work of one handled update"""
+    metrics.observe('handler_seconds', elapsed, handler=handler_name)
+    metrics.inc('handler_db_queries_total', stats.db_queries, handler=handler_name)
+    metrics.inc('handler_db_seconds_total', stats.db_time, handler=handler_name)
+    metrics.inc('handler_api_calls_total', stats.api_calls, handler=handler_name)
+    metrics.inc('handler_api_seconds_total', stats.api_time, handler=handler_name)
+
+
+def record_api_call(method_name: str, elapsed: float):
+    """Record one Bot API request"""
+    metrics.observe('bot_api_seconds', elapsed, method=method_name)
+    stats = current_request.get()
+    if stats is not None:
+        stats.api_calls += 1
+        stats.api_time += elapsed
+
+
+def instrument_engine(engine):
+    """Time every statement executed through the engine"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        metrics.observe('db_query_seconds', elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_time += elapsed
+
+    @event.listens_for(engine, 'handle_error')
+    def _handle_error(context):
+        starts = context.connection.info.get('query_start') if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+async def log_summary():
+    """Log the metrics summary (scheduled every METRICS_LOG_INTERVAL)"""
+    for line in metrics.summary_lines():
+        logger.info("metrics %s", line)
+
+
+async def start_metrics_server(host: str, port: int):
+    """Serve the registry on /metrics for Prometheus scraping"""
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render_prometheus(), content_type='text/plain')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,111 @@
+"""
+Abandoned-cart reminders
+Cart items are scanned in (created_at, id) order from a cursor stored in job_state, so each
+run only reads the items that went stale since the previous one.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+
+from config import (
+    Messages, CART_REMINDER_AFTER_HOURS, CART_REMINDER_MAX_AGE_DAYS, CART_REMINDER_BATCH_SIZE, CART_REMINDER_RATE
+)
+from database import get_session, run_write, CartRepository, ReminderRepository, UserRepository
+from database.tenancy import DEFAULT_TENANT, current_tenant
+from utils.keyboards import get_main_menu_keyboard
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = 'cart_reminders'
+
+
+def _job_name() -> str:
+    """Each tenant scans its own carts from its own cursor"""
+    tenant = current_tenant.get()
+    return JOB_NAME if tenant == DEFAULT_TENANT else f"{JOB_NAME}:{tenant}"
+
+
+def _parse_cursor(cursor: str):
+    created_at, item_id = cursor.rsplit('|', 1)
+    return datetime.fromisoformat(created_at), int(item_id)
+
+
+def _format_cursor(created_at: datetime, item_id: int) -> str:
+    return f"{created_at.isoformat()}|{item_id}"
+
+
+def _next_batch(now: datetime):
+    """
+    Users to remind from the next slice of stale cart items
+    Returns (telegram ids, user ids, new cursor, items scanned), or None when nothing is left
+    """
+    stale_before = now - timedelta(hours=CART_REMINDER_AFTER_HOURS)
+    oldest = (now - timedelta(days=CART_REMINDER_MAX_AGE_DAYS), 0)
+
+    session = get_session()
+    try:
+        cursor = ReminderRepository.get_cursor(session, _job_name())
+        after = max(_parse_cursor(cursor), oldest) if cursor else oldest
+        items = CartRepository.get_stale_items(session, after, stale_before, CART_REMINDER_BATCH_SIZE)
+        if not items:
+            return None
+
+        user_ids = {item.user_id for item in items}
+        last_added = CartRepository.get_last_added(session, user_ids)
+        last_reminded = ReminderRepository.get_last_reminders(session, user_ids)
+        # Skip carts touched since (their newest item comes up later) and carts already reminded
+        due = [
+            user_id for user_id in user_ids
+            if last_added.get(user_id) and last_added[user_id] < stale_before
+            and not (user_id in last_reminded and last_reminded[user_id] >= last_added[user_id])
+        ]
+        telegram_ids = UserRepository.get_telegram_ids(session, due) if due else {}
+    finally:
+        session.close()
+
+    last = items[-1]
+    return list(telegram_ids.values()), due, _format_cursor(last.created_at, last.id), len(items)
+
+
+async def _send(bot: Bot, chat_id: int) -> bool:
+    for attempt in range(2):
+        try:
+            await bot.send_message(chat_id, Messages.CART_REMINDER, reply_markup=get_main_menu_keyboard())
+            return True
+        except TelegramRetryAfter as e:
+            # Flood control: wait as told, then retry once
+            await asyncio.sleep(e.retry_after)
+        except (TelegramForbiddenError, TelegramBadRequest):
+            # Blocked the bot or deleted the account
+            return False
+    return False
+
+
+async def send_cart_reminders(bot: Bot):
+    """Remind users whose carts went stale since the last run"""
+    now = datetime.utcnow()
+    interval = 1 / CART_REMINDER_RATE
+    sent = 0
+    while True:
+        batch = await asyncio.to_thread(_next_batch, now)
+        if batch is None:
+            break
+        chat_ids, user_ids, cursor, scanned = batch
+
+        # Recorded before sending: a crash can lose this batch's reminders but never repeats them
+        await run_write(ReminderRepository.record, user_ids, now, _job_name(), cursor)
+        for chat_id in chat_ids:
+            if await _send(bot, chat_id):
+                sent += 1
+            await asyncio.sleep(interval)
+
+        if scanned < CART_REMINDER_BATCH_SIZE:
+            break
+
+    if sent:
+        metrics.inc('cart_reminders_sent_total', sent)
+        logger.info(f"Sent {sent} cart reminders")
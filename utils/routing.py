@@ -0,0 +1,118 @@
+"""
+Delivery route planning: groups nearby orders on a grid and orders stops by distance
+Pure Python; a dispatch run handles tens of orders, far below where numpy would pay off
+"""
+from math import asin, cos, floor, radians, sin, sqrt
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(a, b) -> float:
+    """Great-circle distance between two (latitude, longitude) points"""
+    lat1, lon1, lat2, lon2 = map(radians, (*a, *b))
+    h = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(min(1.0, h)))
+
+
+def distance_matrix(points):
+    """Pairwise haversine distances; trig terms are computed once per point"""
+    lats = [radians(lat) for lat, _ in points]
+    lons = [radians(lon) for _, lon in points]
+    cos_lats = [cos(lat) for lat in lats]
+    size = len(points)
+    matrix = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        for j in range(i + 1, size):
+            h = sin((lats[j] - lats[i]) / 2) ** 2 + cos_lats[i] * cos_lats[j] * sin((lons[j] - lons[i]) / 2) ** 2
+            matrix[i][j] = matrix[j][i] = 2 * EARTH_RADIUS_KM * asin(sqrt(min(1.0, h)))
+    return matrix
+
+
+def grid_cell(point, cell_km: float):
+    """Grid cell of a point; cells are roughly cell_km wide at any latitude"""
+    lat, lon = point
+    return (
+        floor(lat * KM_PER_DEGREE / cell_km),
+        floor(lon * KM_PER_DEGREE * cos(radians(lat)) / cell_km)
+    )
+
+
+def grid_clusters(points, cell_km: float):
+    """
+    Group point indices into clusters of touching grid cells
+    Each point is hashed to a cell once, and only the 8 neighbouring cells are probed,
+    so clustering is linear in the number of points
+    """
+    cells = {}
+    for index, point in enumerate(points):
+        cells.setdefault(grid_cell(point, cell_km), []).append(index)
+
+    # Union-find over occupied cells
+    parent = {cell: cell for cell in cells}
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for row, col in cells:
+        for neighbour in ((row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)):
+            if neighbour in cells:
+                parent[find(neighbour)] = find((row, col))
+
+    clusters = {}
+    for cell, indices in cells.items():
+        clusters.setdefault(find(cell), []).extend(indices)
+    return sorted(clusters.values(), key=len, reverse=True)
+
+
+def order_stops(points, start=None):
+    """Visiting order of points by nearest neighbour, starting near `start` if given"""
+    if not points:
+        return []
+    nodes = list(points) + ([start] if start else [])
+    matrix = distance_matrix(nodes)
+
+    remaining = set(range(len(points)))
+    if start:
+        current = len(points)
+    else:
+        current = 0
+        remaining.discard(0)
+    route = [] if start else [0]
+    while remaining:
+        current = min(remaining, key=matrix[current].__getitem__)
+        remaining.discard(current)
+        route.append(current)
+    return route
+
+
+def plan_routes(stops, capacities, cell_km: float, start=None):
+    """
+    Split stops between couriers so each gets one compact route
+    stops: list of (key, latitude, longitude); capacities: {courier: free stops}
+    Returns {courier: [key, ...]} in visiting order; stops that do not fit wait for the next run
+    """
+    points = [(lat, lon) for _, lat, lon in stops]
+    max_stops = max(capacities.values(), default=0)
+    if max_stops <= 0:
+        return {}
+
+    # Break clusters into route sized chunks, keeping close stops together
+    chunks = []
+    for cluster in grid_clusters(points, cell_km):
+        ordered = [cluster[i] for i in order_stops([points[i] for i in cluster], start)]
+        chunks.extend(ordered[i:i + max_stops] for i in range(0, len(ordered), max_stops))
+    chunks.sort(key=len, reverse=True)
+
+    # Largest chunks go to the couriers with the most free stops, one route each
+    couriers = sorted((free, courier) for courier, free in capacities.items() if free > 0)
+    routes = {}
+    for chunk in chunks:
+        if not couriers:
+            break
+        free, courier = couriers.pop()
+        routes[courier] = [stops[i][0] for i in chunk[:free]]
+    return routes
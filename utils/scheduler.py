@@ -0,0 +1,56 @@
+"""
+Background job scheduler: runs coroutines at fixed intervals on the bot's event loop
+"""
+import asyncio
+import logging
+import time
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """
+    Periodic jobs, each in its own task
+    A run that fails is logged and retried at the next interval; runs of one job never overlap
+    """
+
+    def __init__(self):
+        self._jobs = []
+        self._tasks = []
+
+    def every(self, interval: float, job, *args, name: str = None, run_at_start: bool = False):
+        """Run `await job(*args)` every `interval` seconds; an interval <= 0 disables the job"""
+        if interval > 0:
+            self._jobs.append((name or job.__name__, interval, job, args, run_at_start))
+        return self
+
+    def start(self):
+        """Start all registered jobs"""
+        for name, interval, job, args, run_at_start in self._jobs:
+            self._tasks.append(asyncio.create_task(self._run(name, interval, job, args, run_at_start), name=name))
+        if self._jobs:
+            logger.info(f"Scheduler started: {', '.join(job[0] for job in self._jobs)}")
+
+    async def stop(self):
+        """Cancel all jobs and wait for them to finish"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, name: str, interval: float, job, args, run_at_start: bool):
+        if not run_at_start:
+            await asyncio.sleep(interval)
+        while True:
+            start = time.perf_counter()
+            try:
+                await job(*args)
+            except Exception:
+                metrics.inc('scheduler_job_errors_total', job=name)
+                logger.exception(f"Scheduled job {name} failed")
+            elapsed = time.perf_counter() - start
+            metrics.observe('scheduler_job_seconds', elapsed, job=name)
+            # Fixed rate: a slow run shortens the next wait instead of drifting
+            await asyncio.sleep(max(0.0, interval - elapsed))
@@ -0,0 +1,43 @@
+"""
+Update sharding helpers for multi-worker mode
+"""
+
+# Update fields carrying the acting user, in the order Telegram documents them
+USER_EVENT_FIELDS = (
+    'message', 'edited_message', 'callback_query', 'inline_query', 'chosen_inline_result',
+    'shipping_query', 'pre_checkout_query', 'poll_answer', 'my_chat_member', 'chat_member',
+    'chat_join_request',
+)
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach)
+    Growing from n to n+1 buckets moves only 1/(n+1) of the keys
+    """
+    key &= 0xFFFFFFFFFFFFFFFF
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def update_user_id(raw_update: dict) -> int:
+    """Telegram id of the user behind a raw update, 0 if there is none"""
+    for field in USER_EVENT_FIELDS:
+        event = raw_update.get(field)
+        if event:
+            user = event.get('from') or event.get('user')
+            if user:
+                return user['id']
+            chat = event.get('chat')
+            if chat:
+                return chat['id']
+    return 0
+
+
+def shard_for(raw_update: dict, workers: int) -> int:
+    """Worker index that owns this update's user"""
+    return jump_hash(update_user_id(raw_update), workers)
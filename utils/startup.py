@@ -0,0 +1,60 @@
+"""
+Startup pipeline: timed steps and cache warming before the bot takes its first update
+"""
+import asyncio
+import logging
+import time
+
+from config import CATALOG_PAGE_SIZE, WARMUP_CONNECTIONS
+from database import get_session, CategoryRepository, ProductRepository, VariantRepository
+from database.tenancy import DEFAULT_TENANT, for_tenant
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Wall time of each startup step, logged as one line once the bot is ready"""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._steps = []
+
+    async def run(self, name: str, awaitable):
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self._steps.append((name, time.perf_counter() - start))
+
+    def summary(self) -> str:
+        steps = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self._steps)
+        return f"Started in {(time.perf_counter() - self._start) * 1000:.0f} ms ({steps})"
+
+
+def _warm_catalog():
+    """
+    Read the first catalog pages once: opens a pooled connection, pulls the pages
+    into the database cache and compiles the catalog queries
+    """
+    session = get_session()
+    try:
+        page = CategoryRepository.get_active_page(session, CATALOG_PAGE_SIZE)
+        for category in page.items:
+            products = ProductRepository.get_page_by_category(session, category.id, CATALOG_PAGE_SIZE)
+            if products.items:
+                VariantRepository.get_by_product(session, products.items[0].id)
+    finally:
+        session.close()
+
+
+async def warm_caches(connections: int = WARMUP_CONNECTIONS, tenants=(DEFAULT_TENANT,)):
+    """
+    Warm several pooled connections at once, so the first users after a deploy don't open them;
+    the connections take turns over the tenants, so every tenant's catalog is warmed
+    """
+    if connections <= 0:
+        return
+    await asyncio.gather(*(
+        for_tenant(tenants[index % len(tenants)], asyncio.to_thread)(_warm_catalog)
+        for index in range(max(connections, len(tenants)))
+    ))